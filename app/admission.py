@@ -0,0 +1,305 @@
+"""
+Admission control for WN-PrinterHub
+Global budgets for in-flight payload bytes, open printer sockets and concurrent scans
+"""
+import asyncio
+import collections
+import contextvars
+import logging
+import re
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import config
+from .tracing import Trace, current_trace, span
+
+logger = logging.getLogger(__name__)
+
+
+class OverBudget(Exception):
+    """A budget stayed exhausted for the whole queue timeout; the caller should retry later."""
+
+    def __init__(self, budget: str, retry_after_s: int):
+        super().__init__(f"Server busy: {budget} budget exhausted, retry in {retry_after_s}s")
+        self.budget = budget
+        self.retry_after_s = retry_after_s
+
+
+class Budget:
+    """
+    A counted resource shared by all requests.
+
+    Reservations are granted in arrival order; a caller waits for capacity up to
+    a timeout, then gets OverBudget. Callers must reject requests larger than the
+    whole budget themselves (e.g. with 413); such a reservation could never be granted.
+    """
+
+    def __init__(self, name: str, capacity: int, retry_after_s: int = 1):
+        self.name = name
+        self.capacity = capacity
+        self.retry_after_s = retry_after_s
+        self.in_use = 0
+        self.rejected = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = collections.deque()
+
+    async def acquire(self, amount: int, timeout_s: Optional[float]) -> int:
+        """Reserve amount units, waiting up to timeout_s (None waits forever); returns the amount held."""
+        if amount > self.capacity:
+            raise ValueError(f"Cannot reserve {amount} of {self.capacity} {self.name}")
+        if not self._waiters and self.in_use + amount <= self.capacity:
+            self.in_use += amount
+            return amount
+
+        future = asyncio.get_event_loop().create_future()
+        waiter = (amount, future)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout_s)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected += 1
+            logger.warning(f"{self.name} budget exhausted ({self.in_use}/{self.capacity} in use), rejecting")
+            raise OverBudget(self.name, self.retry_after_s)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        return amount
+
+    def release(self, amount: int):
+        """Return units and wake waiters that now fit, in arrival order."""
+        self.in_use -= amount
+        self._wake()
+
+    def _abandon(self, waiter: Tuple[int, asyncio.Future]):
+        amount, future = waiter
+        if future.done() and not future.cancelled():
+            # Granted just as the wait ended; hand the units back
+            self.release(amount)
+            return
+        future.cancel()
+        if waiter in self._waiters:
+            # A large waiter at the head may have been blocking smaller ones
+            self._waiters.remove(waiter)
+            self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            amount, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + amount > self.capacity:
+                return
+            self._waiters.popleft()
+            self.in_use += amount
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def reserve(self, amount: int = 1, timeout_s: Optional[float] = None) -> AsyncIterator[int]:
+        """Hold a reservation for the duration of the block."""
+        held = await self.acquire(amount, timeout_s)
+        try:
+            yield held
+        finally:
+            self.release(held)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_use": self.in_use,
+            "capacity": self.capacity,
+            "waiting": len(self._waiters),
+            "rejected": self.rejected,
+        }
+
+
+class Reservation:
+    """
+    Units held on a budget until every holder has let go.
+
+    The creator is the first holder; hold_until() adds a future as another,
+    so e.g. a print job keeps its payload reserved after its request ends.
+    """
+
+    def __init__(self, budget: Budget, amount: int):
+        self.budget = budget
+        self.amount = amount
+        self._holders = 1
+
+    def hold_until(self, future: asyncio.Future):
+        """Keep the units until the future is done too."""
+        self._holders += 1
+        future.add_done_callback(lambda _: self.release())
+
+    def release(self):
+        """Let go of one hold; the units return to the budget after the last one."""
+        self._holders -= 1
+        if self._holders == 0:
+            self.budget.release(self.amount)
+
+
+_request_reservation: contextvars.ContextVar[Optional[Reservation]] = contextvars.ContextVar(
+    "wn_request_reservation", default=None
+)
+
+
+def request_reservation() -> Optional[Reservation]:
+    """The payload reservation of the request being handled, if its path is admission controlled."""
+    return _request_reservation.get()
+
+
+class AdmissionController:
+    """
+    Budgets that keep a burst of prints, pings or scans within the box's RAM and file descriptors.
+
+    Requests over budget queue for up to queue_timeout_s and are then rejected
+    with 429 and a Retry-After hint, instead of the process running out of memory.
+    """
+
+    def __init__(self, max_inflight_bytes: int, max_sockets: int, max_scans: int,
+                 queue_timeout_s: float = 2.0, retry_after_s: int = 1):
+        self.queue_timeout_s = queue_timeout_s
+        self.payload_bytes = Budget("payload_bytes", max_inflight_bytes, retry_after_s)
+        self.sockets = Budget("sockets", max_sockets, retry_after_s)
+        self.scans = Budget("scans", max_scans, retry_after_s)
+
+    async def reserve_payload(self, amount: int) -> Reservation:
+        """Reserve payload bytes, queueing up to the queue timeout; the caller releases the reservation."""
+        return Reservation(self.payload_bytes, await self.payload_bytes.acquire(amount, self.queue_timeout_s))
+
+    def reserve_socket(self, wait: bool = False):
+        """Hold one printer socket; wait=True queues without a timeout (for already admitted work)."""
+        return self.sockets.reserve(1, None if wait else self.queue_timeout_s)
+
+    def reserve_scan(self):
+        """Hold a concurrent scan slot, queueing up to the queue timeout."""
+        return self.scans.reserve(1, self.queue_timeout_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "payload_bytes": self.payload_bytes.stats(),
+            "sockets": self.sockets.stats(),
+            "scans": self.scans.stats(),
+            "queue_timeout_ms": int(self.queue_timeout_s * 1000),
+        }
+
+
+def error_response(status_code: int, detail: str, headers: Optional[Dict[str, str]] = None) -> JSONResponse:
+    """Error body in the same shape as the app's exception handlers."""
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": detail, "status_code": status_code},
+        headers=headers
+    )
+
+
+def over_budget_response(exc: OverBudget) -> JSONResponse:
+    """429 telling the client when to retry."""
+    return error_response(429, str(exc), {"Retry-After": str(exc.retry_after_s)})
+
+
+class AdmissionMiddleware:
+    """
+    Reserves print payload memory before the request body is read.
+
+    Requests are authenticated first, so an unauthenticated client cannot hold
+    the budget. Bodies declared larger than max_request_bytes (or the whole
+    budget) get 413; the rest reserve their Content-Length, or the maximum when
+    no length is sent, and must arrive within body_timeout_s. The reservation
+    is held until the response has been sent, or longer by work that takes it
+    over (see request_reservation). The wait for budget and the
+    upload are traced as the admission and receive spans.
+    """
+
+    def __init__(self, app: ASGIApp, controller: "AdmissionController", paths: re.Pattern,
+                 authenticate: Callable[[Optional[str]], Awaitable[Any]],
+                 max_request_bytes: int, body_timeout_s: float):
+        self.app = app
+        self.controller = controller
+        self.paths = paths
+        self.authenticate = authenticate
+        self.max_request_bytes = max_request_bytes
+        self.body_timeout_s = body_timeout_s
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not self.paths.fullmatch(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        try:
+            await self.authenticate(headers.get("authorization"))
+        except HTTPException as e:
+            await error_response(e.status_code, e.detail)(scope, receive, send)
+            return
+
+        limit = min(self.max_request_bytes, self.controller.payload_bytes.capacity)
+        try:
+            size = int(headers.get("content-length") or limit)
+        except ValueError:
+            size = limit
+        if size > limit:
+            await error_response(413, f"Body larger than {limit} bytes")(scope, receive, send)
+            return
+
+        try:
+            with span("admission"):
+                reservation = await self.controller.reserve_payload(max(size, 0))
+        except OverBudget as e:
+            await over_budget_response(e)(scope, receive, send)
+            return
+        token = _request_reservation.set(reservation)
+        try:
+            await self.app(scope, self._bounded(receive, reservation.amount, current_trace()), send)
+        finally:
+            _request_reservation.reset(token)
+            reservation.release()
+
+    def _bounded(self, receive: Receive, limit: int, trace: Optional[Trace]) -> Receive:
+        """
+        Wrap receive so the body must arrive within the timeout and stay within the reservation.
+
+        Once the body is complete its upload time is added to the trace as the
+        receive span and marked as body_received.
+        """
+        loop = asyncio.get_event_loop()
+        started = loop.time()
+        deadline = started + self.body_timeout_s
+        received = 0
+        body_done = False
+
+        async def bounded_receive() -> Message:
+            nonlocal received, body_done
+            if body_done:
+                return await receive()
+            try:
+                message = await asyncio.wait_for(receive(), timeout=max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                raise HTTPException(status_code=408, detail=f"Body not received within {self.body_timeout_s:g}s")
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=f"Body larger than {limit} bytes")
+                body_done = not message.get("more_body", False)
+                if body_done and trace is not None:
+                    trace.add("receive", loop.time() - started)
+                    trace.mark("body_received")
+            else:
+                body_done = True
+            return message
+
+        return bounded_receive
+
+
+# Global admission controller
+admission = AdmissionController(
+    max_inflight_bytes=config.max_inflight_bytes,
+    max_sockets=config.max_open_sockets,
+    max_scans=config.max_concurrent_scans,
+    queue_timeout_s=config.admission_queue_timeout_ms / 1000,
+    retry_after_s=config.admission_retry_after_s
+)
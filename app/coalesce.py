@@ -0,0 +1,67 @@
+"""
+Request coalescing for WN-PrinterHub
+Single-flight execution with a short TTL result cache
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+
+    Concurrent callers with the same key await the same in-flight call and share
+    its result; successful results are then served from cache for ttl_s seconds.
+    Exceptions are propagated to every waiter and never cached.
+    """
+
+    def __init__(self, ttl_s: float = 0.0, max_cached: int = 1024):
+        self.ttl_s = ttl_s
+        self.max_cached = max_cached
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return fn()'s result for key, sharing in-flight calls and cached results."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, result = cached
+            if time.monotonic() < expires_at:
+                return result
+            del self._cache[key]
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(key, fn))
+            # Retrieve the exception even if every waiter was cancelled
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+        # Shield so one cancelled waiter does not cancel the shared call
+        return await asyncio.shield(future)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            result = await fn()
+            if self.ttl_s > 0:
+                self._store(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, result: Any):
+        now = time.monotonic()
+        if len(self._cache) >= self.max_cached:
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            if len(self._cache) >= self.max_cached:
+                del self._cache[next(iter(self._cache))]
+        self._cache[key] = (now + self.ttl_s, result)
+
+    def invalidate(self, key: Hashable):
+        """Drop a cached result."""
+        self._cache.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        """Drop every cached result whose key matches predicate."""
+        for key in [key for key in self._cache if predicate(key)]:
+            del self._cache[key]
@@ -0,0 +1,79 @@
+"""
+Compressed payload support for WN-PrinterHub
+Bounded, streaming gzip/zstd decompression of print payloads
+"""
+import gzip
+import io
+import zlib
+from typing import BinaryIO, Iterator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Read size used when only measuring a payload
+_MEASURE_CHUNK = 256 * 1024
+
+
+class UnsupportedEncoding(ValueError):
+    """The payload encoding is unknown or its library is not installed."""
+
+
+class DecompressionError(ValueError):
+    """The payload is not valid data for its declared encoding."""
+
+
+class PayloadTooLarge(ValueError):
+    """The payload decompresses to more than the allowed size."""
+
+
+def supported_encodings() -> list:
+    """Encodings accepted for compressed payloads."""
+    return ["gzip", "zstd"] if zstandard is not None else ["gzip"]
+
+
+def _open(payload: bytes, encoding: str) -> BinaryIO:
+    if encoding == "gzip":
+        return gzip.GzipFile(fileobj=io.BytesIO(payload))
+    if encoding == "zstd":
+        if zstandard is None:
+            raise UnsupportedEncoding("zstd payloads require the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(payload))
+    raise UnsupportedEncoding(f"Unsupported encoding: {encoding}")
+
+
+def iter_decompressed(payload: bytes, encoding: str, chunk_size: int, max_bytes: int) -> Iterator[bytes]:
+    """
+    Decompress a payload incrementally, yielding chunks of at most chunk_size bytes.
+
+    Never holds more than one chunk of decompressed data; raises PayloadTooLarge
+    as soon as the output would exceed max_bytes.
+    """
+    total = 0
+    with _open(payload, encoding) as reader:
+        while True:
+            try:
+                chunk = reader.read(chunk_size)
+            except (OSError, EOFError, zlib.error) as e:
+                raise DecompressionError(f"Invalid {encoding} data: {e}")
+            except Exception as e:
+                if zstandard is not None and isinstance(e, zstandard.ZstdError):
+                    raise DecompressionError(f"Invalid {encoding} data: {e}")
+                raise
+            if not chunk:
+                return
+            total += len(chunk)
+            if total > max_bytes:
+                raise PayloadTooLarge(f"Payload decompresses to more than {max_bytes} bytes")
+            yield chunk
+
+
+def decompressed_size(payload: bytes, encoding: str, max_bytes: int) -> int:
+    """Validate a payload and return its decompressed size without keeping the output."""
+    return sum(len(chunk) for chunk in iter_decompressed(payload, encoding, _MEASURE_CHUNK, max_bytes))
+
+
+def decompress(payload: bytes, encoding: str, max_bytes: int) -> bytes:
+    """Decompress a whole payload, raising PayloadTooLarge past max_bytes."""
+    return b"".join(iter_decompressed(payload, encoding, _MEASURE_CHUNK, max_bytes))
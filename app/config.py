@@ -20,9 +20,43 @@ class Config:
         self.use_auth = os.getenv("USE_AUTH", "true").lower() in ("true", "1", "yes", "on")
         self.allowed_origins = self._parse_allowed_origins()
         self.printer_default_port = int(os.getenv("WN_PRINTER_DEFAULT_PORT", "9100"))
+        self.printer_chunk_size = int(os.getenv("WN_PRINTER_CHUNK_SIZE", "4096"))
+        self.printer_chunk_delay_ms = int(os.getenv("WN_PRINTER_CHUNK_DELAY_MS", "0"))
+        self.printer_flow_control = os.getenv("WN_PRINTER_FLOW_CONTROL", "false").lower() in ("true", "1", "yes", "on")
+        self.printer_profiles_file = os.getenv("WN_PRINTER_PROFILES_FILE", "")
+        self.job_history_size = int(os.getenv("WN_JOB_HISTORY_SIZE", "200"))
+        self.max_decompressed_bytes = int(os.getenv("WN_MAX_DECOMPRESSED_BYTES", str(16 * 1024 * 1024)))
+        self.ping_cache_ttl_ms = int(os.getenv("WN_PING_CACHE_TTL_MS", "1000"))
+        self.scan_cache_ttl_ms = int(os.getenv("WN_SCAN_CACHE_TTL_MS", "5000"))
+        self.router_mode = os.getenv("WN_ROUTER_MODE", "false").lower() in ("true", "1", "yes", "on")
+        self.router_hubs_file = os.getenv("WN_ROUTER_HUBS_FILE", "")
+        self.router_timeout_s = float(os.getenv("WN_ROUTER_TIMEOUT_S", "10"))
+        self.router_cache_ttl_s = float(os.getenv("WN_ROUTER_CACHE_TTL_S", "30"))
+        self.events_probe_interval_s = float(os.getenv("WN_EVENTS_PROBE_INTERVAL_S", "10"))
+        self.events_heartbeat_s = float(os.getenv("WN_EVENTS_HEARTBEAT_S", "15"))
+        self.events_token_ttl_s = int(os.getenv("WN_EVENTS_TOKEN_TTL_S", "60"))
+        self.events_host_ttl_s = float(os.getenv("WN_EVENTS_HOST_TTL_S", "600"))
+        self.events_max_hosts = int(os.getenv("WN_EVENTS_MAX_HOSTS", "256"))
+        self.tracing_enabled = os.getenv("WN_TRACING_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+        self.slow_request_ms = float(os.getenv("WN_SLOW_REQUEST_MS", "500"))
+        self.slow_request_log_size = int(os.getenv("WN_SLOW_REQUEST_LOG_SIZE", "100"))
+        self.loop_lag_interval_ms = int(os.getenv("WN_LOOP_LAG_INTERVAL_MS", "500"))
+        self.loop_lag_warn_ms = int(os.getenv("WN_LOOP_LAG_WARN_MS", "100"))
+        self.max_inflight_bytes = int(os.getenv("WN_MAX_INFLIGHT_BYTES", str(64 * 1024 * 1024)))
+        self.max_open_sockets = int(os.getenv("WN_MAX_OPEN_SOCKETS", "128"))
+        self.max_request_bytes = int(os.getenv("WN_MAX_REQUEST_BYTES", str(24 * 1024 * 1024)))
+        self.request_body_timeout_ms = int(os.getenv("WN_REQUEST_BODY_TIMEOUT_MS", "30000"))
+        self.max_concurrent_scans = int(os.getenv("WN_MAX_CONCURRENT_SCANS", "2"))
+        self.admission_queue_timeout_ms = int(os.getenv("WN_ADMISSION_QUEUE_TIMEOUT_MS", "2000"))
+        self.admission_retry_after_s = int(os.getenv("WN_ADMISSION_RETRY_AFTER_S", "1"))
+        self.warmup_enabled = os.getenv("WN_WARMUP_ENABLED", "true").lower() in ("true", "1", "yes", "on")
+        self.warmup_printers = [p.strip() for p in os.getenv("WN_WARMUP_PRINTERS", "").split(",") if p.strip()]
+        self.warmup_timeout_ms = int(os.getenv("WN_WARMUP_TIMEOUT_MS", "2000"))
+        self.profiler_enabled = os.getenv("WN_PROFILER_ENABLED", "false").lower() in ("true", "1", "yes", "on")
         self.host = os.getenv("WN_HOST", "0.0.0.0")
         self.port = int(os.getenv("WN_PORT", "8088"))
         self.log_level = os.getenv("WN_LOG_LEVEL", "INFO").upper()
+        self.fast_serving = os.getenv("WN_FAST_SERVING", "true").lower() in ("true", "1", "yes", "on")
         
         self._validate_config()
     
@@ -59,6 +93,48 @@ class Config:
         if not (1 <= self.printer_default_port <= 65535):
             raise ValueError(f"Invalid printer port: {self.printer_default_port}")
         
+        if self.printer_chunk_size < 0:
+            raise ValueError(f"Invalid printer chunk size: {self.printer_chunk_size}. Use 0 to disable chunking.")
+        
+        if self.printer_chunk_delay_ms < 0:
+            raise ValueError(f"Invalid printer chunk delay: {self.printer_chunk_delay_ms}")
+        
+        if self.job_history_size < 1:
+            raise ValueError(f"Invalid job history size: {self.job_history_size}")
+        
+        if self.max_decompressed_bytes < 1024:
+            raise ValueError(f"Invalid max decompressed size: {self.max_decompressed_bytes}")
+        
+        if self.ping_cache_ttl_ms < 0 or self.scan_cache_ttl_ms < 0:
+            raise ValueError("Ping/scan cache TTL cannot be negative (use 0 to disable caching)")
+        
+        if self.router_mode and not self.router_hubs_file:
+            raise ValueError("WN_ROUTER_MODE requires WN_ROUTER_HUBS_FILE")
+        
+        if self.events_probe_interval_s < 1 or self.events_heartbeat_s < 1:
+            raise ValueError("Event probe interval and heartbeat must be at least 1 second")
+        
+        if self.events_token_ttl_s < 1 or self.events_host_ttl_s < 1 or self.events_max_hosts < 1:
+            raise ValueError("Event token TTL, printer expiry and printer limit must be at least 1")
+        
+        if self.slow_request_ms < 0 or self.slow_request_log_size < 1:
+            raise ValueError("Slow request threshold cannot be negative and the log needs at least 1 entry")
+        
+        if self.max_inflight_bytes < 1024 or self.max_open_sockets < 1 or self.max_concurrent_scans < 1:
+            raise ValueError("Admission budgets must allow at least 1 KiB in flight, 1 socket and 1 scan")
+        
+        if self.max_request_bytes < 1024 or self.request_body_timeout_ms < 100:
+            raise ValueError("Max request size must be at least 1 KiB and the body timeout at least 100ms")
+        
+        if self.admission_queue_timeout_ms < 0 or self.admission_retry_after_s < 1:
+            raise ValueError("Admission queue timeout cannot be negative and Retry-After must be at least 1s")
+        
+        if not (100 <= self.warmup_timeout_ms <= 30000):
+            raise ValueError(f"Invalid warm-up timeout: {self.warmup_timeout_ms}ms (100-30000)")
+        
+        if self.loop_lag_interval_ms < 10:
+            raise ValueError(f"Invalid loop lag interval: {self.loop_lag_interval_ms}ms (minimum 10ms)")
+        
         if self.log_level not in ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]:
             logger.warning(f"Invalid log level: {self.log_level}. Using INFO.")
             self.log_level = "INFO"
@@ -2,7 +2,8 @@
 ESC/POS utilities for WN-PrinterHub
 Enhanced ESC/POS command generation with additional features
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import re
 import textwrap
 
 
@@ -34,7 +35,16 @@ class ESCPOSCommands:
     CUT_PARTIAL = b"\x1d\x56\x01"
     FEED_LINE = b"\x0a"
     
+    # Real-time status (DLE EOT n)
+    STATUS_PRINTER = b"\x10\x04\x01"
+    STATUS_OFFLINE_CAUSE = b"\x10\x04\x02"
+    STATUS_OFFLINE_BIT = 0x08
+    
+    # Printable area
+    PRINT_AREA_WIDTH = b"\x1d\x57"  # GS W nL nH
+    
     # Character sets
+    CODEPAGE_SELECT = b"\x1b\x74"  # ESC t n
     CHARSET_USA = b"\x1b\x52\x00"
     CHARSET_FRANCE = b"\x1b\x52\x01"
     CHARSET_GERMANY = b"\x1b\x52\x02"
@@ -43,15 +53,32 @@ class ESCPOSCommands:
 class ESCPOSBuilder:
     """Builder for creating ESC/POS commands with fluent interface."""
     
-    def __init__(self):
+    def __init__(self, columns: int = 32, codepage: Optional[int] = None, cut_supported: bool = True,
+                 dot_width: Optional[int] = None):
+        self.columns = columns
+        self.cut_supported = cut_supported
         self._commands = bytearray()
         self.initialize()
+        if dot_width is not None:
+            self.print_width(dot_width)
+        if codepage is not None:
+            self.codepage(codepage)
+    
+    def print_width(self, dots: int):
+        """Set the printable area width in dots (GS W nL nH)."""
+        self._commands.extend(ESCPOSCommands.PRINT_AREA_WIDTH + dots.to_bytes(2, "little"))
+        return self
     
     def initialize(self):
         """Initialize the printer."""
         self._commands.extend(ESCPOSCommands.INIT)
         return self
     
+    def codepage(self, table: int):
+        """Select character code table (ESC t n)."""
+        self._commands.extend(ESCPOSCommands.CODEPAGE_SELECT + bytes([table]))
+        return self
+    
     def text(self, content: str, encoding: str = "utf-8"):
         """Add text content."""
         try:
@@ -107,13 +134,15 @@ class ESCPOSBuilder:
         return self
     
     def cut(self, partial: bool = False):
-        """Cut paper. Use partial=True for partial cut."""
+        """Cut paper. Use partial=True for partial cut. Ignored if the printer has no cutter."""
+        if not self.cut_supported:
+            return self
         self._commands.extend(ESCPOSCommands.CUT_PARTIAL if partial else ESCPOSCommands.CUT_FULL)
         return self
     
-    def separator(self, char: str = "-", width: int = 32):
-        """Add a separator line."""
-        self.line(char * width)
+    def separator(self, char: str = "-", width: Optional[int] = None):
+        """Add a separator line, full paper width by default."""
+        self.line(char * (width or self.columns))
         return self
     
     def header(self, title: str, encoding: str = "utf-8"):
@@ -137,7 +166,7 @@ class ESCPOSBuilder:
         """Add a table row with specified column widths."""
         if widths is None:
             # Default equal width distribution
-            total_width = 32
+            total_width = self.columns
             width_per_col = total_width // len(columns)
             widths = [width_per_col] * len(columns)
         
@@ -168,10 +197,17 @@ def create_receipt(items: list, total: float, **kwargs) -> bytes:
     Args:
         items: List of dictionaries with 'name', 'qty', 'price' keys
         total: Total amount
-        **kwargs: Additional options like header, footer, encoding
+        **kwargs: Additional options like header, footer, encoding,
+            columns, codepage, cut_supported, dot_width
     """
-    builder = ESCPOSBuilder()
+    builder = ESCPOSBuilder(
+        columns=kwargs.get('columns', 32),
+        codepage=kwargs.get('codepage'),
+        cut_supported=kwargs.get('cut_supported', True),
+        dot_width=kwargs.get('dot_width')
+    )
     encoding = kwargs.get('encoding', 'utf-8')
+    widths = [builder.columns - 16, 6, 10]
     
     # Header
     if 'header' in kwargs:
@@ -182,20 +218,20 @@ def create_receipt(items: list, total: float, **kwargs) -> bytes:
         builder.align("center").line(kwargs['datetime'], encoding).feed(1)
     
     # Items table
-    builder.separator("=", 32)
-    builder.table_row(["Item", "Qty", "Price"], [16, 6, 10], encoding)
-    builder.separator("-", 32)
+    builder.separator("=")
+    builder.table_row(["Item", "Qty", "Price"], widths, encoding)
+    builder.separator("-")
     
     for item in items:
         name = str(item.get('name', ''))
         qty = str(item.get('qty', ''))
         price = f"${item.get('price', 0):.2f}"
-        builder.table_row([name, qty, price], [16, 6, 10], encoding)
+        builder.table_row([name, qty, price], widths, encoding)
     
     # Total
-    builder.separator("-", 32)
-    builder.bold(True).table_row(["TOTAL:", "", f"${total:.2f}"], [16, 6, 10], encoding).bold(False)
-    builder.separator("=", 32)
+    builder.separator("-")
+    builder.bold(True).table_row(["TOTAL:", "", f"${total:.2f}"], widths, encoding).bold(False)
+    builder.separator("=")
     
     # Footer
     if 'footer' in kwargs:
@@ -213,9 +249,15 @@ def create_receipt(items: list, total: float, **kwargs) -> bytes:
 def create_simple_text(text: str, **options) -> bytes:
     """
     Create simple formatted text with ESC/POS commands.
-    Supports the same options as the original function for compatibility.
+    Supports the same options as the original function for compatibility,
+    plus printer profile options: columns, codepage, cut_supported, dot_width.
     """
-    builder = ESCPOSBuilder()
+    builder = ESCPOSBuilder(
+        columns=options.get('columns', 32),
+        codepage=options.get('codepage'),
+        cut_supported=options.get('cut_supported', True),
+        dot_width=options.get('dot_width')
+    )
     
     encoding = options.get('encoding', 'utf-8')
     append_newlines = options.get('append_newlines', 2)
@@ -230,4 +272,216 @@ def create_simple_text(text: str, **options) -> bytes:
     if append_cut:
         builder.cut()
     
-    return builder.build()
\ No newline at end of file
+    return builder.build()
+
+
+def split_at_cuts(data: bytes) -> List[bytes]:
+    """
+    Split an ESC/POS stream into tickets at safe cut boundaries.
+    
+    A boundary is a paper cut command immediately followed by ESC @ (or the
+    end of data). Commands are parsed with CommandScanner, so cut-like bytes
+    inside raster images or other command data are not split on, and nothing
+    is split after a command of unknown length. Each returned segment ends
+    with its cut command.
+    """
+    segments = []
+    start = 0
+    for end, command in CommandScanner().feed(data):
+        if command == b"\x1dV" and (end == len(data) or data[end:end + 2] == b"\x1b@"):
+            segments.append(data[start:end])
+            start = end
+    if start < len(data):
+        segments.append(data[start:])
+    return segments or [data]
+
+
+# Bytes that start a command (DLE, ESC, FS, GS) or end a line (LF)
+_COMMAND_START = re.compile(rb"[\x0a\x10\x1b\x1c\x1d]")
+
+# Parameter byte counts of fixed-length commands, by the byte after the prefix
+_ESC_PARAMS = {
+    **dict.fromkeys(b"\x0c2<@LSimv", 0),
+    **dict.fromkeys(b" !%-3=?EGJMRTUVadertu{", 1),
+    **dict.fromkeys(b"$\\c", 2),
+    ord("p"): 3,
+    ord("W"): 8,
+}
+_GS_PARAMS = {
+    **dict.fromkeys(b":c", 0),
+    **dict.fromkeys(b"!/BEHITabfhjrw", 1),
+    **dict.fromkeys(b"$LPW\\", 2),
+    **dict.fromkeys(b"^z", 3),
+    ord("g"): 4,
+}
+_FS_PARAMS = {
+    **dict.fromkeys(b"&.", 0),
+    **dict.fromkeys(b"!-CW", 1),
+    **dict.fromkeys(b"Sp", 2),
+}
+
+
+def _sized_command(data, i: int) -> Optional[int]:
+    """Length of a "prefix ( fn pL pH data" command."""
+    if len(data) - i < 5:
+        return None
+    return 5 + data[i + 3] + data[i + 4] * 256
+
+
+def _terminated_command(data, i: int, start: int, max_length: int) -> Optional[int]:
+    """Length of a command whose data ends with NUL."""
+    end = bytes(data[i + start:i + start + max_length + 1]).find(b"\x00")
+    if end >= 0:
+        return start + end + 1
+    return None if len(data) - i <= start + max_length else -1
+
+
+def _command_length(data, i: int) -> Optional[int]:
+    """
+    Total length of the command at data[i], including image or barcode data.
+    
+    Returns None when more bytes are needed to tell, and -1 for a command
+    whose length is unknown.
+    """
+    prefix = data[i]
+    if prefix == 0x0a:
+        return 1
+    available = len(data) - i
+    if available < 2:
+        return None
+    code = data[i + 1]
+    
+    if prefix == 0x10:
+        # DLE EOT n / DLE ENQ n; DLE DC4 fn m t
+        if code in (0x04, 0x05):
+            return 3
+        if code == 0x14:
+            if available < 3:
+                return None
+            return 5 if data[i + 2] in (1, 2) else -1
+        return -1
+    
+    if prefix == 0x1b:
+        if code in _ESC_PARAMS:
+            return 2 + _ESC_PARAMS[code]
+        if code == ord("*"):
+            # ESC * m nL nH d1...dk: 8-dot columns take 1 byte, 24-dot columns 3
+            if available < 5:
+                return None
+            columns = data[i + 3] + data[i + 4] * 256
+            return 5 + columns * (1 if data[i + 2] in (0, 1) else 3)
+        if code == ord("("):
+            return _sized_command(data, i)
+        if code == ord("D"):
+            return _terminated_command(data, i, 2, 32)
+        return -1
+    
+    if prefix == 0x1d:
+        if code in _GS_PARAMS:
+            return 2 + _GS_PARAMS[code]
+        if code == ord("v"):
+            # GS v 0 m xL xH yL yH d1...dk: raster bit image
+            if available < 8:
+                return None
+            if data[i + 2] != ord("0"):
+                return -1
+            return 8 + (data[i + 4] + data[i + 5] * 256) * (data[i + 6] + data[i + 7] * 256)
+        if code == ord("("):
+            return _sized_command(data, i)
+        if code == ord("8"):
+            # GS 8 L p1 p2 p3 p4 ...: graphics data with a 32-bit length
+            if available < 7:
+                return None
+            if data[i + 2] != ord("L"):
+                return -1
+            return 7 + int.from_bytes(bytes(data[i + 3:i + 7]), "little")
+        if code == ord("k"):
+            # GS k m: NUL-terminated data for m <= 6, otherwise a length byte
+            if available < 3:
+                return None
+            if data[i + 2] <= 6:
+                return _terminated_command(data, i, 3, 255)
+            if available < 4:
+                return None
+            return 4 + data[i + 3]
+        if code == ord("V"):
+            # GS V m, or GS V m n for the feed-and-cut variants
+            if available < 3:
+                return None
+            return 4 if data[i + 2] in (65, 66, 97, 98, 103, 104) else 3
+        if code == ord("*"):
+            # GS * x y d1...dk: downloaded bit image
+            if available < 4:
+                return None
+            return 4 + data[i + 2] * data[i + 3] * 8
+        return -1
+    
+    # FS
+    if code in _FS_PARAMS:
+        return 2 + _FS_PARAMS[code]
+    if code == ord("("):
+        return _sized_command(data, i)
+    return -1
+
+
+class CommandScanner:
+    """
+    Finds where ESC/POS commands and lines end in a stream fed chunk by chunk.
+    
+    Parameter, image and barcode bytes of known commands are skipped, so bytes
+    that look like commands inside raster data are not reported. After a
+    command whose length cannot be known, nothing more is reported.
+    """
+    
+    def __init__(self):
+        self.lost = False
+        self._skip = 0
+        self._skipped_command = b""
+        self._pending = b""
+    
+    def feed(self, data: bytes) -> List[Tuple[int, bytes]]:
+        """
+        Scan the next chunk of the stream.
+        
+        Returns (offset just past the end, first two bytes of the command)
+        for every command or line feed that ends in this chunk.
+        """
+        ends: List[Tuple[int, bytes]] = []
+        if self.lost:
+            return ends
+        
+        position = 0
+        if self._skip:
+            if self._skip > len(data):
+                self._skip -= len(data)
+                return ends
+            position, self._skip = self._skip, 0
+            ends.append((position, self._skipped_command))
+        
+        # A command split across chunks is scanned again from its start
+        buffer, base, i = data, 0, position
+        if self._pending:
+            buffer, base, i = self._pending + bytes(data), len(self._pending), 0
+            self._pending = b""
+        
+        while True:
+            match = _COMMAND_START.search(buffer, i)
+            if match is None:
+                break
+            i = match.start()
+            length = _command_length(buffer, i)
+            if length is None:
+                self._pending = bytes(buffer[i:])
+                break
+            if length < 0:
+                self.lost = True
+                break
+            command = bytes(buffer[i:i + min(length, 2)])
+            end = i + length
+            if end > len(buffer):
+                self._skip = end - len(buffer)
+                self._skipped_command = command
+                break
+            ends.append((end - base, command))
+            i = end
+        return ends
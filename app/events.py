@@ -0,0 +1,181 @@
+"""
+Event push for WN-PrinterHub
+In-process pub/sub bus and printer online/offline monitor feeding /api/v1/events
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """Fan-out pub/sub bus; each subscriber gets its own bounded queue."""
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._has_subscribers: Optional[asyncio.Event] = None
+
+    def _signal(self) -> asyncio.Event:
+        # Created lazily so it binds to the running loop, not the import-time one
+        if self._has_subscribers is None:
+            self._has_subscribers = asyncio.Event()
+        return self._has_subscribers
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers."""
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber queue."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue)
+        self._subscribers.add(queue)
+        self._signal().set()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Remove a subscriber queue."""
+        self._subscribers.discard(queue)
+        if not self._subscribers:
+            self._signal().clear()
+
+    async def wait_for_subscribers(self):
+        """Block until at least one subscriber is connected."""
+        await self._signal().wait()
+
+    def publish(self, event_type: str, data: Dict[str, Any]):
+        """Deliver an event to all subscribers without blocking; slow subscribers drop their oldest events."""
+        if not self._subscribers:
+            return
+        event = {"type": event_type, "timestamp": time.time(), "data": data}
+        for queue in self._subscribers:
+            if queue.full():
+                dropped = queue.get_nowait()
+                logger.debug(f"Event queue full, dropped {dropped['type']}")
+            queue.put_nowait(event)
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Encode an event as a Server-Sent Events message."""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def issue_stream_token(secret: str, ttl_s: int) -> str:
+    """Short-lived token for ?token= on the event stream, so the API token never goes in a URL."""
+    expires_at = int(time.time()) + ttl_s
+    return f"{expires_at}.{_stream_signature(secret, expires_at)}"
+
+
+def verify_stream_token(secret: str, token: str) -> bool:
+    """Check a stream token's signature and expiry."""
+    expires_at, _, signature = token.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(signature.encode(), _stream_signature(secret, int(expires_at)).encode())
+
+
+def _stream_signature(secret: str, expires_at: int) -> str:
+    return hmac.new(secret.encode(), f"events:{expires_at}".encode(), hashlib.sha256).hexdigest()
+
+
+_TOKEN_PARAM = re.compile(r"([?&]token=)[^&\s]*")
+
+
+class RedactTokenFilter(logging.Filter):
+    """Masks ?token= values in access log lines."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.args, tuple):
+            record.args = tuple(
+                _TOKEN_PARAM.sub(r"\1***", arg) if isinstance(arg, str) else arg for arg in record.args
+            )
+        return True
+
+
+class PrinterStatusMonitor:
+    """
+    Tracks printer reachability and publishes online/offline transitions.
+
+    Observations come from pings, prints and scans; while clients are subscribed,
+    a single background loop also probes every known printer, so N clients cost
+    one probe stream. Configured printers are probed for good; printers only
+    seen in requests are dropped after host_ttl_s without being seen again, and
+    at most max_hosts of them are kept.
+    """
+
+    def __init__(self, bus: EventBus,
+                 probe: Callable[[str, int], Awaitable[Optional[bool]]],
+                 interval_s: float = 10.0, host_ttl_s: float = 600.0, max_hosts: int = 256):
+        self.bus = bus
+        self.probe = probe
+        self.interval_s = interval_s
+        self.host_ttl_s = host_ttl_s
+        self.max_hosts = max_hosts
+        self._states: Dict[Tuple[str, int], Optional[bool]] = {}
+        self._tracked: Set[Tuple[str, int]] = set()
+        # Printers not configured, by when a request last saw them, oldest first
+        self._last_seen: Dict[Tuple[str, int], float] = {}
+
+    def observe(self, host: str, port: int, online: bool):
+        """Record a reachability observation, publishing a transition event if it changed."""
+        key = (host, port)
+        if key not in self._tracked:
+            self._last_seen.pop(key, None)
+            self._last_seen[key] = time.monotonic()
+            self._expire()
+        self._update(key, online)
+
+    def _update(self, key: Tuple[str, int], online: bool):
+        previous = self._states.get(key)
+        self._states[key] = online
+        if previous is not online:
+            host, port = key
+            self.bus.publish(
+                "printer.online" if online else "printer.offline",
+                {"host": host, "port": port, "previous": previous}
+            )
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.host_ttl_s
+        while self._last_seen:
+            key, seen = next(iter(self._last_seen.items()))
+            if seen >= cutoff and len(self._last_seen) <= self.max_hosts:
+                return
+            del self._last_seen[key]
+            self._states.pop(key, None)
+
+    def track(self, printers: Iterable[Tuple[str, int]]):
+        """Add printers to the probe set for good, without an observation yet."""
+        for key in printers:
+            self._tracked.add(key)
+            self._last_seen.pop(key, None)
+            self._states.setdefault(key, None)
+
+    def snapshot(self) -> Dict[str, Optional[bool]]:
+        """Current known state keyed by 'host:port'."""
+        return {f"{host}:{port}": online for (host, port), online in self._states.items()}
+
+    async def run(self):
+        """Probe known printers periodically while anyone is subscribed."""
+        while True:
+            await self.bus.wait_for_subscribers()
+            self._expire()
+            targets = list(self._states)
+            if targets:
+                results = await asyncio.gather(
+                    *(self.probe(host, port) for host, port in targets),
+                    return_exceptions=True
+                )
+                for key, result in zip(targets, results):
+                    # None means the probe could not run (e.g. server busy); keep the last state.
+                    # Probing does not count as seeing the printer, so idle ones still expire.
+                    if result is not None and key in self._states:
+                        self._update(key, result is True)
+            await asyncio.sleep(self.interval_s)
@@ -0,0 +1,104 @@
+"""
+Printer groups for WN-PrinterHub
+Named sets of identical printers with load-balanced routing and failover
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Literal
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class PrinterGroup(BaseModel):
+    """A named set of interchangeable printers."""
+    name: str = Field(..., description="Group name used as print target")
+    hosts: List[str] = Field(..., min_length=1, description="Member printer IPs")
+    strategy: Literal["least_outstanding", "latency"] = Field(
+        "least_outstanding", description="Routing strategy"
+    )
+    cooldown_s: float = Field(10.0, ge=0, le=3600, description="How long a failed member is avoided")
+
+
+class GroupRouter:
+    """
+    Orders group members for each job and tracks their load and health.
+
+    Healthy members come first, ordered by outstanding jobs or by smoothed job
+    latency; members that recently failed a job are tried last.
+    """
+
+    # Weight of the newest sample in the latency moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, groups: Dict[str, PrinterGroup]):
+        self.groups = groups
+        self._outstanding: Dict[str, int] = {}
+        self._latency_ms: Dict[str, float] = {}
+        self._unhealthy_until: Dict[str, float] = {}
+
+    def candidates(self, group_name: str) -> List[str]:
+        """Members of a group in the order they should be tried."""
+        group = self.groups[group_name]
+        now = time.monotonic()
+
+        def rank(host: str):
+            unhealthy = self._unhealthy_until.get(host, 0) > now
+            if group.strategy == "latency":
+                # Unmeasured members rank first so they get sampled
+                load = self._latency_ms.get(host, 0.0) * (1 + self._outstanding.get(host, 0))
+            else:
+                load = self._outstanding.get(host, 0)
+            return (unhealthy, load)
+
+        return sorted(group.hosts, key=rank)
+
+    def track(self, host: str, future: asyncio.Future):
+        """
+        Count a job as outstanding on host until its future resolves.
+
+        Records the job's latency if it succeeds. Tied to the job's future rather
+        than the caller, so a client disconnect does not drop a job still printing.
+        """
+        self._outstanding[host] = self._outstanding.get(host, 0) + 1
+        start = time.perf_counter()
+
+        def done(f: asyncio.Future):
+            self._outstanding[host] -= 1
+            if f.cancelled() or f.exception() is not None:
+                return
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            previous = self._latency_ms.get(host)
+            self._latency_ms[host] = elapsed_ms if previous is None else (
+                self.LATENCY_ALPHA * elapsed_ms + (1 - self.LATENCY_ALPHA) * previous
+            )
+            self._unhealthy_until.pop(host, None)
+
+        future.add_done_callback(done)
+
+    def mark_failed(self, group_name: str, host: str):
+        """Avoid a member for the group's cooldown after it failed to connect or to take a job."""
+        cooldown = self.groups[group_name].cooldown_s
+        self._unhealthy_until[host] = time.monotonic() + cooldown
+        logger.warning(f"Printer {host} in group '{group_name}' marked unhealthy for {cooldown:.0f}s")
+
+    def status(self) -> Dict[str, dict]:
+        """Per-group member load and health for the API."""
+        now = time.monotonic()
+        return {
+            name: {
+                "strategy": group.strategy,
+                "members": [
+                    {
+                        "host": host,
+                        "outstanding": self._outstanding.get(host, 0),
+                        "latency_ms": round(self._latency_ms[host], 1) if host in self._latency_ms else None,
+                        "healthy": self._unhealthy_until.get(host, 0) <= now,
+                    }
+                    for host in group.hosts
+                ],
+            }
+            for name, group in self.groups.items()
+        }
@@ -0,0 +1,104 @@
+"""
+Print job tracking for WN-PrinterHub
+In-memory registry of recent print jobs and their progress
+"""
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
+
+
+class PrintJob:
+    """State and progress of a single print job."""
+
+    def __init__(self, host: str, port: int, mode: str, total_bytes: int,
+                 on_change: Optional[Callable[["PrintJob"], None]] = None,
+                 priority: str = "normal"):
+        self.job_id = uuid.uuid4().hex
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.priority = priority
+        self.status = "queued"
+        self.total_bytes = total_bytes
+        self.bytes_sent = 0
+        self.chunks_sent = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._on_change = on_change
+
+    def _notify(self):
+        if self._on_change:
+            self._on_change(self)
+
+    def start(self):
+        """Mark the job as being sent to the printer."""
+        self.status = "sending"
+        self.started_at = time.time()
+        self._notify()
+
+    def update_progress(self, bytes_sent: int, chunks_sent: int):
+        """Record how much of the payload has been written so far."""
+        self.bytes_sent = bytes_sent
+        self.chunks_sent = chunks_sent
+
+    def complete(self):
+        """Mark the job as fully delivered."""
+        self.status = "completed"
+        self.finished_at = time.time()
+        self._notify()
+
+    def fail(self, error: str, status: str = "failed"):
+        """Mark the job as failed (or "expired" when dropped at its deadline) with the given reason."""
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self._notify()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job for API responses."""
+        progress = 1.0 if self.total_bytes == 0 else self.bytes_sent / self.total_bytes
+        return {
+            "job_id": self.job_id,
+            "host": self.host,
+            "port": self.port,
+            "mode": self.mode,
+            "priority": self.priority,
+            "status": self.status,
+            "total_bytes": self.total_bytes,
+            "bytes_sent": self.bytes_sent,
+            "chunks_sent": self.chunks_sent,
+            "progress": round(progress, 4),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobRegistry:
+    """Bounded registry of recent print jobs, oldest evicted first."""
+
+    def __init__(self, max_jobs: int = 200, on_change: Optional[Callable[[PrintJob], None]] = None):
+        self.max_jobs = max_jobs
+        self.on_change = on_change
+        self._jobs: "OrderedDict[str, PrintJob]" = OrderedDict()
+
+    def create(self, host: str, port: int, mode: str, total_bytes: int, priority: str = "normal") -> PrintJob:
+        """Register a new job and evict the oldest ones beyond capacity."""
+        job = PrintJob(host, port, mode, total_bytes, on_change=self.on_change, priority=priority)
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+        job._notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[PrintJob]:
+        """Look up a job by id."""
+        return self._jobs.get(job_id)
+
+    def recent(self, limit: int = 50) -> List[PrintJob]:
+        """Return the most recent jobs, newest first."""
+        return list(reversed(self._jobs.values()))[:limit]
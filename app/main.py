@@ -5,18 +5,46 @@ FastAPI-based local printer connector service
 import asyncio
 import base64
 import contextlib
+import re
 import time
 import logging
-from typing import Literal, Optional, List
+from typing import Callable, Dict, Iterable, Iterator, Literal, Optional, List, Tuple, Union
 
-from fastapi import FastAPI, Depends, HTTPException, Header, Request
+from fastapi import FastAPI, Depends, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, field_validator
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 
+from .admission import (
+    AdmissionMiddleware, OverBudget, Reservation, admission, over_budget_response, request_reservation
+)
+from .coalesce import SingleFlight
+from .compression import (
+    DecompressionError, PayloadTooLarge, UnsupportedEncoding, decompress, decompressed_size, iter_decompressed,
+    supported_encodings
+)
 from .config import config
-from .escpos_utils import create_simple_text, ESCPOSBuilder
-from .network_utils import scan_network_for_printers, get_local_network_info, enhanced_ping, validate_ip_address
+from .escpos_utils import create_simple_text, split_at_cuts, CommandScanner, ESCPOSBuilder, ESCPOSCommands
+from .events import (
+    EventBus, PrinterStatusMonitor, RedactTokenFilter, format_sse, issue_stream_token, verify_stream_token
+)
+from .groups import GroupRouter
+from .jobs import JobRegistry
+from .profiles import PrinterProfile, profile_registry
+from .scheduler import DeadlineExceeded, ScheduledJob, Scheduler
+from .responses import (
+    DefaultResponse, JobListResponse, JobStatusResponse, NetworkInfoResponse, PingResponse, ScanResponse,
+    dumps, model_response
+)
+from .router import HubRegistry, create_hub_router, load_hubs
+from .warmup import WarmupState, parse_printers, run_warmup
+from .tracing import (
+    LoopLagMonitor, SlowRequestLog, current_trace, profile_event_loop, span, span_since, start_trace,
+    use_trace
+)
+from .network_utils import (
+    scan_network_for_printers, get_local_network_info, enhanced_ping, validate_ip_address, hosts_for_cidr
+)
 
 # Setup logging
 logging.basicConfig(
@@ -25,15 +53,87 @@ logging.basicConfig(
 )
 logger = logging.getLogger("wn-printerhub")
 
+# In-process pub/sub for /api/v1/events
+event_bus = EventBus()
+
+# Recent print jobs and their progress; state changes are pushed as job.<status> events
+job_registry = JobRegistry(
+    max_jobs=config.job_history_size,
+    on_change=lambda job: event_bus.publish(f"job.{job.status}", job.to_dict())
+)
+
+
+# Concurrent pings/scans of the same target share one in-flight probe
+ping_flight = SingleFlight(ttl_s=config.ping_cache_ttl_ms / 1000)
+scan_flight = SingleFlight(ttl_s=config.scan_cache_ttl_ms / 1000)
+
+
+async def coalesced_ping(host: str, port: int, timeout_ms: int, mode: str = "full") -> dict:
+    """
+    Ping a printer, sharing the probe with concurrent pings of the same host, port, mode and timeout.
+    
+    The timeout is part of the key so a short ping never waits on a long probe,
+    nor gets a cached failure from a probe that gave up sooner.
+    """
+    return await ping_flight.do(
+        (host, port, mode, timeout_ms), lambda: enhanced_ping(host, port, timeout_ms, mode)
+    )
+
+
+async def probe_printer(host: str, port: int) -> Optional[bool]:
+    """Reachability probe used by the printer status monitor; None when the server is too busy to probe."""
+    try:
+        result = await coalesced_ping(host, port, 1000, mode="connect")
+    except OverBudget:
+        return None
+    return result["ok"]
+
+
+printer_monitor = PrinterStatusMonitor(
+    event_bus, probe_printer, config.events_probe_interval_s,
+    host_ttl_s=config.events_host_ttl_s, max_hosts=config.events_max_hosts
+)
+
+# Load balancing and failover across printer groups
+group_router = GroupRouter(profile_registry.groups)
+
+# Per-printer dispatch queues ordered by priority and deadline
+scheduler = Scheduler()
+
+# Stage timings of slow requests, and how late the event loop runs
+slow_requests = SlowRequestLog(config.slow_request_ms, config.slow_request_log_size)
+loop_lag_monitor = LoopLagMonitor(config.loop_lag_interval_ms / 1000, config.loop_lag_warn_ms)
+
+# Startup warm-up progress; /health is not ready until it completes
+warmup_state = WarmupState(ready=not config.warmup_enabled)
+
 # FastAPI app initialization
 app = FastAPI(
     title="WN-PrinterHub",
     description="Local LAN printer connector service for White Neuron applications",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=DefaultResponse
+)
+
+# Print endpoints whose payload memory is reserved before the body is read,
+# including prints forwarded to a hub in router mode
+PRINT_PATHS = re.compile(r"/api/v1(/hubs/[^/]+)?/print(/raw)?")
+
+
+# Added before CORS so that CORS headers are on its 401/413/429 responses too
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    paths=PRINT_PATHS,
+    # authenticate is defined below; resolved when a request arrives
+    authenticate=lambda authorization: authenticate(authorization),
+    max_request_bytes=config.max_request_bytes,
+    body_timeout_s=config.request_body_timeout_ms / 1000
 )
 
+
 # CORS middleware setup
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +141,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "Server-Timing"],
 )
 
 
@@ -54,8 +155,9 @@ async def add_pna_header(request: Request, call_next):
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all incoming requests."""
+    """Log all incoming requests, with per-stage timings in a Server-Timing header."""
     start_time = time.perf_counter()
+    trace = start_trace() if config.tracing_enabled else None
     
     # Get client IP
     client_ip = request.client.host if request.client else "unknown"
@@ -67,6 +169,13 @@ async def log_requests(request: Request, call_next):
     process_time = time.perf_counter() - start_time
     logger.info(f"Response: {response.status_code} - {process_time:.3f}s")
     
+    if trace is not None:
+        # Keep timings already on the response (e.g. from a downstream hub in router mode)
+        upstream = response.headers.get("Server-Timing")
+        timing = trace.server_timing()
+        response.headers["Server-Timing"] = f"{timing}, {upstream}" if upstream else timing
+        slow_requests.record(request.method, request.url.path, response.status_code, trace,
+                             loop_lag_monitor.current_ms)
     return response
 
 
@@ -75,6 +184,7 @@ class PrinterTarget(BaseModel):
     """Target printer configuration."""
     host: str = Field(..., description="Printer IP address")
     timeout_ms: int = Field(1500, ge=100, le=30000, description="Connection timeout in milliseconds")
+    profile: Optional[str] = Field(None, description="Printer profile name or model (defaults to host assignment)")
 
     @field_validator("host")
     @classmethod
@@ -85,6 +195,46 @@ class PrinterTarget(BaseModel):
         return v.strip()
 
 
+PingMode = Literal["connect", "status", "full"]
+
+
+class PingRequest(PrinterTarget):
+    """Ping request payload."""
+    mode: PingMode = Field("full", description="connect: TCP handshake only, status: DLE EOT query, full: firmware query")
+
+
+class BulkPingRequest(BaseModel):
+    """Bulk ping request payload."""
+    hosts: List[str] = Field(..., min_length=1, max_length=254, description="Printer IP addresses")
+    timeout_ms: int = Field(1500, ge=100, le=30000, description="Connection timeout in milliseconds")
+    mode: PingMode = Field("connect", description="Ping mode applied to every host")
+
+
+class PrintTarget(BaseModel):
+    """Print target: a single printer host or a printer group."""
+    host: Optional[str] = Field(None, description="Printer IP address or hostname")
+    group: Optional[str] = Field(None, description="Printer group name; the job goes to one healthy member")
+    timeout_ms: int = Field(1500, ge=100, le=30000, description="Connection timeout in milliseconds")
+    profile: Optional[str] = Field(None, description="Printer profile name or model (defaults to host assignment)")
+
+    @field_validator("host")
+    @classmethod
+    def validate_host(cls, v):
+        """Host must not be blank."""
+        if v is None:
+            return v
+        if not v.strip():
+            raise ValueError("Host cannot be empty")
+        return v.strip()
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        """Exactly one of host or group must be given."""
+        if bool(self.host) == bool(self.group):
+            raise ValueError("Specify exactly one of host or group")
+        return self
+
+
 class PrintTextOptions(BaseModel):
     """Options for text printing mode."""
     encoding: str = Field("utf-8", description="Text encoding")
@@ -94,18 +244,44 @@ class PrintTextOptions(BaseModel):
 
 class NetworkScanRequest(BaseModel):
     """Network scan request."""
-    network_base: str = Field("192.168.1", description="Network base (e.g., '192.168.1' for 192.168.1.x)")
-    port: int = Field(9100, ge=1, le=65535, description="Port to scan")
+    network_base: Optional[str] = Field(None, description="Network base (e.g., '192.168.1' for 192.168.1.x)")
+    cidr: Optional[str] = Field(None, description="CIDR range to scan (e.g., '10.0.4.0/23'), overrides network_base")
+    port: Optional[int] = Field(None, ge=1, le=65535, description="Port to scan (defaults to default profile port)")
     timeout_ms: int = Field(1000, ge=100, le=10000, description="Timeout per host in milliseconds")
 
+    @field_validator("network_base")
+    @classmethod
+    def validate_network_base(cls, v):
+        """Network base must be the first three octets of an IPv4 address."""
+        if v and not (v.count(".") == 2 and validate_ip_address(f"{v}.0")):
+            raise ValueError(f"Invalid network base: {v}")
+        return v
+
+    @field_validator("cidr")
+    @classmethod
+    def validate_cidr(cls, v):
+        """Reject malformed or oversized ranges."""
+        if v:
+            hosts_for_cidr(v)
+        return v
+
 
 class PrintRequest(BaseModel):
     """Print request payload."""
-    printer: PrinterTarget
+    printer: PrintTarget
     mode: Literal["text", "raw_base64"]
     text: Optional[str] = Field(None, description="Text to print (for text mode)")
     raw_base64: Optional[str] = Field(None, description="Base64-encoded ESC/POS data (for raw mode)")
+    compression: Optional[Literal["gzip", "zstd"]] = Field(
+        None, description="Compression of the data inside raw_base64"
+    )
     text_opts: PrintTextOptions = PrintTextOptions()
+    priority: Literal["urgent", "normal", "bulk"] = Field(
+        "normal", description="Scheduling class; bulk jobs are split at cuts so urgent jobs can go in between"
+    )
+    deadline_ms: Optional[int] = Field(
+        None, ge=1, le=3600000, description="Drop the job if it cannot start printing within this many ms"
+    )
 
     @field_validator("text")
     @classmethod
@@ -147,7 +323,29 @@ async def authenticate(authorization: str = Header(None)):
         raise HTTPException(status_code=403, detail="Invalid token")
 
 
+async def authenticate_stream(authorization: str = Header(None), token: Optional[str] = Query(None)):
+    """
+    Authenticate event streams.
+    
+    Browsers' EventSource cannot set headers, so ?token= is accepted too, but
+    only a short-lived token from POST /api/v1/events/token: URLs end up in
+    access logs and browser history, the API token must not.
+    """
+    if authorization or not token or not config.use_auth:
+        return await authenticate(authorization)
+    if not verify_stream_token(config.api_token, token):
+        raise HTTPException(status_code=403, detail="Invalid or expired event stream token")
+
+
 # Utility functions
+class PrinterConnectError(Exception):
+    """The TCP connection to a printer could not be established; nothing was sent."""
+
+
+class PrinterConnectTimeout(PrinterConnectError, asyncio.TimeoutError):
+    """Connecting to a printer timed out; nothing was sent."""
+
+
 async def tcp_connect(host: str, port: int, timeout_ms: int):
     """Establish TCP connection to printer."""
     try:
@@ -157,18 +355,163 @@ async def tcp_connect(host: str, port: int, timeout_ms: int):
         )
         return reader, writer
     except asyncio.TimeoutError:
-        raise asyncio.TimeoutError(f"Timeout connecting to {host}:{port}")
+        raise PrinterConnectTimeout(f"Timeout connecting to {host}:{port}")
     except Exception as e:
-        raise Exception(f"Connection error to {host}:{port}: {str(e)}")
+        raise PrinterConnectError(f"Connection error to {host}:{port}: {str(e)}")
 
 
-async def tcp_send(host: str, port: int, data: bytes, timeout_ms: int) -> int:
-    """Send data to printer via TCP."""
-    reader, writer = await tcp_connect(host, port, timeout_ms)
-    try:
-        writer.write(data)
+async def wait_until_ready(reader, writer, timeout_ms: int) -> bool:
+    """
+    Poll real-time status (DLE EOT 1) until the printer reports online.
+    
+    Returns False if the printer did not answer the status query, i.e. it
+    does not support it; callers should stop polling on that connection.
+    """
+    loop = asyncio.get_event_loop()
+    deadline = loop.time() + timeout_ms / 1000
+    while True:
+        await discard_input(reader)
+        writer.write(ESCPOSCommands.STATUS_PRINTER)
         await writer.drain()
-        return len(data)
+        try:
+            response = await asyncio.wait_for(reader.read(1), timeout=0.2)
+        except asyncio.TimeoutError:
+            return False
+        if not response:
+            return False
+        if not response[0] & ESCPOSCommands.STATUS_OFFLINE_BIT:
+            return True
+        if loop.time() >= deadline:
+            raise asyncio.TimeoutError("Printer stayed offline during flow control")
+        await asyncio.sleep(0.1)
+
+
+async def discard_input(reader):
+    """Drop bytes the printer already sent (late status answers, automatic status back)."""
+    while True:
+        try:
+            stale = await asyncio.wait_for(reader.read(256), timeout=0.001)
+        except asyncio.TimeoutError:
+            return
+        if not stale:
+            return
+
+
+# Per-printer connection limits and their number of users, keyed by (host, port);
+# entries are dropped when unused so arbitrary hostnames do not accumulate
+_connection_limits: Dict[Tuple[str, int], Tuple[asyncio.Semaphore, int]] = {}
+
+
+@contextlib.asynccontextmanager
+async def connection_slot(host: str, port: int, limit: int):
+    """Hold one of the connections allowed to a printer."""
+    key = (host, port)
+    semaphore, users = _connection_limits.get(key) or (asyncio.Semaphore(limit), 0)
+    _connection_limits[key] = (semaphore, users + 1)
+    try:
+        async with semaphore:
+            yield
+    finally:
+        semaphore, users = _connection_limits[key]
+        if users > 1:
+            _connection_limits[key] = (semaphore, users - 1)
+        else:
+            del _connection_limits[key]
+
+
+def _slices(data: bytes, chunk_size: int) -> Iterator[memoryview]:
+    view = memoryview(data)
+    for start in range(0, len(data), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+async def tcp_send(host: str, port: Optional[int], data: Union[bytes, Iterable[bytes]], timeout_ms: int,
+                   profile: Optional[PrinterProfile] = None,
+                   progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Send data to printer via TCP.
+    
+    Large payloads are written in chunks so printers with small receive
+    buffers are not overrun; each chunk's drain is bounded by timeout_ms.
+    
+    Args:
+        port: Printer port, defaults to the profile port
+        data: Payload bytes, or an iterable of chunks (e.g. streamed
+            decompression) that is only consumed once connected
+        profile: Printer profile with chunking and connection limits,
+            resolved from the host when omitted
+        progress: Callback receiving (bytes_sent, chunks_sent) after each chunk
+    """
+    profile = profile or profile_registry.for_host(host)
+    port = port or profile.port
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        chunk_size = profile.max_chunk_size if profile.max_chunk_size > 0 else max(len(data), 1)
+        data = _slices(data, chunk_size)
+    
+    # The job is already admitted, so wait for a free socket rather than reject it
+    async with connection_slot(host, port, profile.max_connections), admission.reserve_socket(wait=True):
+        return await _tcp_write(host, port, data, timeout_ms,
+                                profile.chunk_delay_ms, profile.flow_control, progress)
+
+
+async def _tcp_write(host: str, port: int, chunks: Iterable[bytes], timeout_ms: int,
+                     chunk_delay_ms: int, flow_control: bool,
+                     progress: Optional[Callable[[int, int], None]]) -> int:
+    """Connect and write chunks with pacing."""
+    with span("connect"):
+        reader, writer = await tcp_connect(host, port, timeout_ms)
+    try:
+        bytes_sent = 0
+        chunks_sent = 0
+        
+        async def write(data):
+            nonlocal bytes_sent
+            writer.write(data)
+            try:
+                with span("drain"):
+                    await asyncio.wait_for(writer.drain(), timeout=timeout_ms / 1000)
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(
+                    f"Timeout writing to {host}:{port} after {bytes_sent} bytes"
+                )
+            bytes_sent += len(data)
+        
+        # Status is polled once per chunk after the first, at the first point where
+        # a command or line ends, so the query never lands inside another command
+        scanner = CommandScanner() if flow_control else None
+        at_boundary = False
+        for chunk in chunks:
+            if chunks_sent > 0 and chunk_delay_ms > 0:
+                with span("chunk_delay"):
+                    await asyncio.sleep(chunk_delay_ms / 1000)
+            
+            poll_at = None
+            if scanner is not None:
+                ends = [end for end, _ in scanner.feed(chunk)]
+                if chunks_sent > 0:
+                    inside = [end for end in ends if end < len(chunk)]
+                    poll_at = 0 if at_boundary else (inside[0] if inside else None)
+                at_boundary = bool(ends) and ends[-1] == len(chunk)
+            
+            if poll_at is None:
+                await write(chunk)
+            else:
+                if poll_at > 0:
+                    await write(chunk[:poll_at])
+                with span("flow_control"):
+                    if not await wait_until_ready(reader, writer, timeout_ms):
+                        logger.info(f"Printer {host}:{port} does not answer status queries; not polling")
+                        scanner = None
+                await write(chunk[poll_at:])
+            
+            chunks_sent += 1
+            if progress:
+                progress(bytes_sent, chunks_sent)
+        return bytes_sent
+    except BaseException:
+        # A graceful close would wait forever to flush data a stalled printer never reads
+        writer.transport.abort()
+        raise
     finally:
         writer.close()
         with contextlib.suppress(Exception):
@@ -212,6 +555,13 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     )
 
 
+@app.exception_handler(OverBudget)
+async def over_budget_handler(request: Request, exc: OverBudget):
+    """Admission budget exhausted: ask the client to retry later."""
+    logger.warning(f"HTTP 429: {str(exc)}")
+    return over_budget_response(exc)
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """General exception handler."""
@@ -225,122 +575,488 @@ async def general_exception_handler(request: Request, exc: Exception):
 # API Routes
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    return {
-        "status": "ok",
+    """Health check endpoint; 503 while the startup warm-up is still running."""
+    content = {
+        "status": "ok" if warmup_state.ready else "warming_up",
+        "ready": warmup_state.ready,
         "service": "WN-PrinterHub",
         "version": "1.0.0",
         "timestamp": time.time(),
         "authentication": "enabled" if config.use_auth else "disabled"
     }
+    if not warmup_state.ready:
+        return JSONResponse(status_code=503, content=content)
+    return content
 
 
-@app.post("/api/v1/printers/ping")
-async def ping_printer(body: PrinterTarget, _=Depends(authenticate)):
+@app.post("/api/v1/printers/ping", response_model=PingResponse, response_model_exclude_none=True)
+async def ping_printer(body: PingRequest, _=Depends(authenticate)):
     """Check printer connectivity."""
     if not validate_ip_address(body.host):
         raise HTTPException(status_code=422, detail=f"Invalid IP address: {body.host}")
     
-    result = await enhanced_ping(body.host, config.printer_default_port, body.timeout_ms)
-    return result
+    profile = profile_registry.for_host(body.host, body.profile)
+    with span("ping"):
+        result = dict(await coalesced_ping(body.host, profile.port, body.timeout_ms, body.mode))
+    result["profile"] = profile.name
+    printer_monitor.observe(body.host, profile.port, result["ok"])
+    return model_response(PingResponse(**result), exclude_none=True)
 
 
-@app.post("/api/v1/printers/scan")
+@app.post("/api/v1/printers/ping/bulk")
+async def ping_printers_bulk(body: BulkPingRequest, _=Depends(authenticate)):
+    """
+    Ping many printers concurrently.
+    
+    Streams newline-delimited JSON, one result per host in completion order.
+    """
+    async def ping_one(host: str) -> dict:
+        host = host.strip()
+        if not validate_ip_address(host):
+            return {"host": host, "ok": False, "message": f"Invalid IP address: {host}", "error_type": "invalid"}
+        profile = profile_registry.for_host(host)
+        try:
+            result = dict(await coalesced_ping(host, profile.port, body.timeout_ms, body.mode))
+        except OverBudget as e:
+            return {"host": host, "ok": False, "message": str(e), "error_type": "busy"}
+        result.update(host=host, port=profile.port, profile=profile.name)
+        printer_monitor.observe(host, profile.port, result["ok"])
+        return result
+    
+    async def stream():
+        for next_result in asyncio.as_completed([ping_one(host) for host in dict.fromkeys(body.hosts)]):
+            yield dumps(await next_result) + "\n"
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.post("/api/v1/printers/scan", response_model=ScanResponse)
 async def scan_printers(body: NetworkScanRequest, _=Depends(authenticate)):
-    """Scan network for printers."""
-    logger.info(f"Scanning network {body.network_base} on port {body.port}")
+    """
+    Scan network for printers.
+    
+    Scans `cidr` or `network_base` when given, otherwise the range of the
+    local interface holding the default route.
+    """
+    port = body.port or profile_registry.default.port
+    with span("network_info"):
+        network_info = get_local_network_info()
+    if body.cidr:
+        cidrs = [body.cidr]
+    elif body.network_base:
+        cidrs = [f"{body.network_base}.0/24"]
+    else:
+        cidrs = network_info["scan_ranges"][:1] or ["192.168.1.0/24"]
+    network_base = body.network_base or network_info["network_base"]
+    
+    async def run_scan():
+        async with admission.reserve_scan():
+            return await scan_network_for_printers(port=port, timeout_ms=body.timeout_ms, cidrs=cidrs)
     
     try:
-        printers = await scan_network_for_printers(
-            network_base=body.network_base,
-            port=body.port,
-            timeout_ms=body.timeout_ms
-        )
+        with span("scan"):
+            printers = await scan_flight.do((tuple(cidrs), port, body.timeout_ms), run_scan)
+        printers = [dict(printer) for printer in printers]
+        for printer in printers:
+            printer["profile"] = profile_registry.for_host(printer["host"]).name
+            printer_monitor.observe(printer["host"], port, True)
+        event_bus.publish("scan.completed", {
+            "ranges": cidrs,
+            "port": port,
+            "printers": printers
+        })
         
-        return {
-            "ok": True,
-            "network_base": body.network_base,
-            "port": body.port,
-            "printers_found": len(printers),
-            "printers": printers,
-            "scan_info": get_local_network_info()
-        }
+        return model_response(ScanResponse(
+            network_base=network_base,
+            ranges=cidrs,
+            port=port,
+            printers_found=len(printers),
+            printers=printers,
+            scan_info=network_info
+        ))
         
+    except OverBudget:
+        raise
     except Exception as e:
         logger.error(f"Network scan failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Scan failed: {str(e)}")
 
 
-@app.get("/api/v1/network/info")
+@app.get("/api/v1/network/info", response_model=NetworkInfoResponse)
 async def network_info(_=Depends(authenticate)):
     """Get local network information."""
-    return {
-        "ok": True,
-        "network_info": get_local_network_info()
-    }
+    return model_response(NetworkInfoResponse(network_info=get_local_network_info()))
 
 
-@app.post("/api/v1/print")
-async def print_document(request: PrintRequest, _=Depends(authenticate)):
-    """Send print job to printer."""
-    logger.info(f"Print request: mode={request.mode}, printer={request.printer.host}")
-    
-    # Prepare print data based on mode
+def render_print_data(request: PrintRequest, profile: PrinterProfile) -> bytes:
+    """Build the ESC/POS payload of a print request for the given printer profile."""
     if request.mode == "text":
         if not request.text:
             raise HTTPException(status_code=422, detail="Text is required for text mode")
         
+        # Use the profile encoding unless the client chose one explicitly
+        encoding = request.text_opts.encoding
+        if "encoding" not in request.text_opts.model_fields_set:
+            encoding = profile.encoding
+        
         # Use enhanced ESC/POS utilities
-        data = create_simple_text(
-            request.text,
-            encoding=request.text_opts.encoding,
-            append_newlines=request.text_opts.append_newlines,
-            append_cut=request.text_opts.append_cut
-        )
+        with span("escpos"):
+            data = create_simple_text(
+                request.text,
+                encoding=encoding,
+                append_newlines=request.text_opts.append_newlines,
+                append_cut=request.text_opts.append_cut,
+                columns=profile.columns,
+                codepage=profile.codepage,
+                cut_supported=profile.cut_supported,
+                dot_width=profile.dot_width
+            )
         
         logger.info(f"Generated ESC/POS data: {len(data)} bytes")
-        
-    else:  # raw_base64 mode
-        if not request.raw_base64:
-            raise HTTPException(status_code=422, detail="raw_base64 is required for raw_base64 mode")
-        
-        try:
+        return data
+    
+    # raw_base64 mode
+    if not request.raw_base64:
+        raise HTTPException(status_code=422, detail="raw_base64 is required for raw_base64 mode")
+    
+    try:
+        with span("b64decode"):
             data = base64.b64decode(request.raw_base64, validate=True)
-            logger.info(f"Decoded raw data: {len(data)} bytes")
-        except Exception as e:
-            logger.error(f"Base64 decode error: {str(e)}")
-            raise HTTPException(status_code=422, detail="Invalid base64 data")
+        logger.info(f"Decoded raw data: {len(data)} bytes")
+        return data
+    except Exception as e:
+        logger.error(f"Base64 decode error: {str(e)}")
+        raise HTTPException(status_code=422, detail="Invalid base64 data")
+
+
+async def send_print_job(host: str, profile: PrinterProfile, data: bytes, mode: str, timeout_ms: int,
+                         priority: str = "normal", deadline: Optional[float] = None,
+                         compression: Optional[str] = None, total_bytes: Optional[int] = None,
+                         group: Optional[str] = None, reservations: Iterable[Reservation] = ()):
+    """
+    Queue a payload on the printer's dispatcher as a tracked job; returns the completed job.
+    
+    The job's outcome is recorded when the dispatch finishes, even if the
+    client disconnects first. Jobs sent to a group member count as
+    outstanding on it until then, and any failure to print (refused connect,
+    a drain that times out on a jammed printer, ...) marks it unhealthy.
+    
+    Bulk jobs are split into tickets at cut boundaries, each sent on its own
+    connection, so higher-priority jobs can be printed in between. Compressed
+    payloads are decompressed chunk by chunk straight into the connection
+    (bulk ones arrive here already decompressed, see dispatch_print).
     
-    # Send to printer
+    The payload's memory reservations are held until the dispatch finishes,
+    since a queued job keeps the data after its request has ended.
+    """
+    job = job_registry.create(host, profile.port, mode, total_bytes or len(data), priority=priority)
+    if compression:
+        chunk_size = profile.max_chunk_size or 64 * 1024
+        segments = [iter_decompressed(data, compression, chunk_size, config.max_decompressed_bytes)]
+    elif priority == "bulk":
+        segments = split_at_cuts(data)
+    else:
+        segments = [data]
+    
+    # Segments are sent from the dispatcher's worker task; keep timing them on this request
+    trace = current_trace()
+    queued_at = time.perf_counter()
+    
+    async def send_segment(segment, offset: int) -> int:
+        with use_trace(trace):
+            if offset == 0:
+                job.start()
+                if trace is not None:
+                    trace.add("queue", time.perf_counter() - queued_at)
+            return await tcp_send(
+                host, profile.port, segment, timeout_ms, profile=profile,
+                progress=lambda sent, chunks: job.update_progress(offset + sent, job.chunks_sent + 1)
+            )
+    
+    def finish(future: asyncio.Future):
+        error = future.exception()
+        if error is None:
+            job.complete()
+            printer_monitor.observe(host, profile.port, True)
+        elif isinstance(error, DeadlineExceeded):
+            job.fail(str(error), status="expired")
+        else:
+            job.fail(str(error) or "timeout")
+            printer_monitor.observe(host, profile.port, False)
+            if group:
+                group_router.mark_failed(group, host)
+            ping_flight.invalidate_where(lambda key: key[:2] == (host, profile.port))
+    
+    dispatcher = scheduler.dispatcher(host, profile.port, profile.max_connections)
+    scheduled = ScheduledJob(segments, priority, deadline, send_segment)
+    future = dispatcher.submit(scheduled)
+    future.add_done_callback(finish)
+    for reservation in reservations:
+        reservation.hold_until(future)
+    if group:
+        group_router.track(host, future)
+    # Shielded so a disconnecting client does not abort a job mid-ticket
+    await asyncio.shield(future)
+    return job
+
+
+async def dispatch_print(target: PrintTarget, mode: str, render: Callable[[PrinterProfile], bytes],
+                         priority: str = "normal", deadline_ms: Optional[int] = None,
+                         compression: Optional[str] = None) -> dict:
+    """
+    Render and send a print job to a host or printer group.
+    
+    Group targets go to the best member; if connecting fails, the job fails
+    over to the next member. Jobs are never retried once data was sent.
+    """
+    if target.group:
+        if target.group not in group_router.groups:
+            raise HTTPException(status_code=404, detail=f"Unknown printer group: {target.group}")
+        hosts = group_router.candidates(target.group)
+    else:
+        hosts = [target.host]
+    logger.info(f"Print request: mode={mode}, printer={target.group or target.host}")
+    
+    # Group members are interchangeable, so render once for the first candidate
+    with span("render"):
+        data = render(profile_registry.for_host(hosts[0], target.profile))
+    deadline = time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+    
+    total_bytes = None
+    if compression:
+        # Validate and measure before sending anything, so an oversized or corrupt
+        # payload never leaves a half-printed ticket
+        try:
+            with span("decompress_check"):
+                total_bytes = await asyncio.get_event_loop().run_in_executor(
+                    None, decompressed_size, data, compression, config.max_decompressed_bytes
+                )
+        except PayloadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UnsupportedEncoding as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except DecompressionError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        logger.info(f"Compressed payload: {len(data)} bytes -> {total_bytes} bytes ({compression})")
+    
+    reservations = [reservation for reservation in [request_reservation()] if reservation is not None]
+    async with contextlib.AsyncExitStack() as stack:
+        if compression and priority == "bulk":
+            # Bulk jobs are split at cuts, which needs the whole payload inflated;
+            # its memory is charged on top of the request body's reservation
+            if total_bytes > admission.payload_bytes.capacity:
+                raise HTTPException(status_code=413, detail=f"Payload decompresses to more than "
+                                                            f"{admission.payload_bytes.capacity} bytes")
+            inflated = await admission.reserve_payload(total_bytes)
+            stack.callback(inflated.release)
+            reservations.append(inflated)
+            with span("decompress"):
+                data = await asyncio.get_event_loop().run_in_executor(
+                    None, decompress, data, compression, config.max_decompressed_bytes
+                )
+            compression = None
+        
+        for attempt, host in enumerate(hosts, start=1):
+            profile = profile_registry.for_host(host, target.profile)
+            try:
+                job = await send_print_job(
+                    host, profile, data, mode, target.timeout_ms, priority, deadline, compression, total_bytes,
+                    group=target.group, reservations=reservations
+                )
+            
+            except PrinterConnectError as e:
+                # Nothing was sent, so the job can go to the next member (already marked unhealthy)
+                if target.group and attempt < len(hosts):
+                    logger.warning(f"Failing over from {host}: {str(e)}")
+                    continue
+                raise print_error(host, profile.port, e)
+            
+            except Exception as e:
+                raise print_error(host, profile.port, e)
+            
+            logger.info(f"Successfully sent {job.bytes_sent} bytes to printer {host}")
+            
+            result = {
+                "ok": True,
+                "job_id": job.job_id,
+                "bytes_sent": job.bytes_sent,
+                "message": "Printed"
+            }
+            if target.group:
+                result.update(group=target.group, host=host, attempts=attempt)
+            return result
+
+
+@app.post("/api/v1/print")
+async def print_document(request: PrintRequest, _=Depends(authenticate)):
+    """Send print job to printer."""
+    # Body parsing and validation happen between the end of the upload and the handler
+    span_since("validate", "body_received")
+    return await dispatch_print(
+        request.printer,
+        request.mode,
+        lambda profile: render_print_data(request, profile),
+        priority=request.priority,
+        deadline_ms=request.deadline_ms,
+        compression=request.compression if request.mode == "raw_base64" else None
+    )
+
+
+@app.post("/api/v1/print/raw")
+async def print_raw(
+    request: Request,
+    host: Optional[str] = Query(None, description="Printer IP address"),
+    group: Optional[str] = Query(None, description="Printer group name"),
+    timeout_ms: int = Query(1500, ge=100, le=30000),
+    profile: Optional[str] = Query(None, description="Printer profile name or model"),
+    priority: Literal["urgent", "normal", "bulk"] = Query("normal"),
+    deadline_ms: Optional[int] = Query(None, ge=1, le=3600000),
+    content_encoding: Optional[str] = Header(None),
+    _=Depends(authenticate)
+):
+    """
+    Print a binary ESC/POS body (application/octet-stream).
+    
+    The body may be compressed; set Content-Encoding: gzip or zstd.
+    """
     try:
-        bytes_sent = await tcp_send(
-            request.printer.host,
-            config.printer_default_port,
-            data,
-            request.printer.timeout_ms
+        target = PrintTarget(host=host, group=group, timeout_ms=timeout_ms, profile=profile)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors()[0]["msg"])
+    
+    compression = (content_encoding or "identity").strip().lower()
+    if compression == "identity":
+        compression = None
+    elif compression not in supported_encodings():
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding: {content_encoding}")
+    
+    limit = config.max_decompressed_bytes
+    if int(request.headers.get("content-length") or 0) > limit:
+        raise HTTPException(status_code=413, detail=f"Body larger than {limit} bytes")
+    body = bytearray()
+    with span("receive"):
+        async for chunk in request.stream():
+            body.extend(chunk)
+            if len(body) > limit:
+                raise HTTPException(status_code=413, detail=f"Body larger than {limit} bytes")
+    if not body:
+        raise HTTPException(status_code=422, detail="Empty print body")
+    
+    return await dispatch_print(
+        target, "raw", lambda _profile: body,
+        priority=priority, deadline_ms=deadline_ms, compression=compression
+    )
+
+
+def print_error(host: str, port: int, error: Exception) -> HTTPException:
+    """Map a send failure to the HTTP error returned to the client."""
+    if isinstance(error, DeadlineExceeded):
+        logger.warning(f"Print job for {host}:{port} dropped: {str(error)}")
+        return HTTPException(
+            status_code=408,
+            detail=f"Deadline passed before printing on {host}:{port}; job dropped"
         )
-        
-        logger.info(f"Successfully sent {bytes_sent} bytes to printer {request.printer.host}")
-        
+    
+    if isinstance(error, asyncio.TimeoutError):
+        logger.error(f"Timeout sending to printer {host}:{port}")
+        return HTTPException(
+            status_code=504,
+            detail=f"Timeout sending to {host}:{port}"
+        )
+    
+    logger.error(f"Print error to {host}:{port}: {str(error)}")
+    return HTTPException(
+        status_code=502,
+        detail=f"Print error: {str(error)}"
+    )
+
+
+@app.get("/api/v1/printers/groups")
+async def list_groups(_=Depends(authenticate)):
+    """List printer groups with member load and health."""
+    return {
+        "ok": True,
+        "groups": group_router.status()
+    }
+
+
+@app.get("/api/v1/printers/profiles")
+async def list_profiles(host: Optional[str] = None, _=Depends(authenticate)):
+    """List printer profiles, or resolve the profile used for one host."""
+    if host:
         return {
             "ok": True,
-            "bytes_sent": bytes_sent,
-            "message": "Printed"
+            "host": host,
+            "profile": profile_registry.for_host(host).model_dump()
         }
-        
-    except asyncio.TimeoutError:
-        logger.error(f"Timeout sending to printer {request.printer.host}:{config.printer_default_port}")
-        raise HTTPException(
-            status_code=504,
-            detail=f"Timeout sending to {request.printer.host}:{config.printer_default_port}"
-        )
-        
-    except Exception as e:
-        logger.error(f"Print error to {request.printer.host}:{config.printer_default_port}: {str(e)}")
-        raise HTTPException(
-            status_code=502,
-            detail=f"Print error: {str(e)}"
-        )
+    return {
+        "ok": True,
+        "profiles": [profile.model_dump() for profile in profile_registry.all()]
+    }
+
+
+@app.get("/api/v1/jobs", response_model=JobListResponse)
+async def list_jobs(limit: int = 50, _=Depends(authenticate)):
+    """List recent print jobs, newest first."""
+    jobs = job_registry.recent(max(1, min(limit, config.job_history_size)))
+    return model_response(JobListResponse(jobs=[job.to_dict() for job in jobs]))
+
+
+@app.get("/api/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, _=Depends(authenticate)):
+    """Get status and progress of a print job."""
+    job = job_registry.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return model_response(JobStatusResponse(job=job.to_dict()))
+
+
+@app.post("/api/v1/events/token")
+async def events_token(_=Depends(authenticate)):
+    """Issue a short-lived token for connecting to /api/v1/events with ?token=."""
+    return {
+        "ok": True,
+        "token": issue_stream_token(config.api_token, config.events_token_ttl_s),
+        "expires_in": config.events_token_ttl_s
+    }
+
+
+@app.get("/api/v1/events")
+async def events(request: Request, types: Optional[str] = None, _=Depends(authenticate_stream)):
+    """
+    Server-Sent Events stream of job, printer and scan events.
+    
+    Optional `types` filters by comma-separated prefixes (e.g. "job,printer").
+    The first event is a printer.snapshot with all known printer states.
+    """
+    prefixes = tuple(t.strip() for t in types.split(",") if t.strip()) if types else ()
+    queue = event_bus.subscribe()
+    
+    async def stream():
+        try:
+            yield format_sse({
+                "type": "printer.snapshot",
+                "timestamp": time.time(),
+                "data": printer_monitor.snapshot()
+            })
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=config.events_heartbeat_s)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if not prefixes or event["type"].startswith(prefixes):
+                    yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.get("/")
@@ -354,25 +1070,130 @@ async def root():
             "health": "GET /health",
             "network_info": "GET /api/v1/network/info",
             "ping": "POST /api/v1/printers/ping",
+            "ping_bulk": "POST /api/v1/printers/ping/bulk",
             "scan": "POST /api/v1/printers/scan", 
-            "print": "POST /api/v1/print"
+            "profiles": "GET /api/v1/printers/profiles",
+            "groups": "GET /api/v1/printers/groups",
+            "print": "POST /api/v1/print",
+            "print_raw": "POST /api/v1/print/raw",
+            "jobs": "GET /api/v1/jobs",
+            "job_status": "GET /api/v1/jobs/{job_id}",
+            "events": "GET /api/v1/events",
+            "events_token": "POST /api/v1/events/token",
+            "status": "GET /api/v1/status",
+            "slow_requests": "GET /api/v1/debug/slow",
+            "profile": "POST /api/v1/debug/profile",
+            "hubs": "GET /api/v1/hubs (router mode)"
         },
         "documentation": "/docs",
         "features": [
             "ESC/POS text printing",
             "Raw ESC/POS command printing",
+            "Compressed (gzip/zstd) payload ingest",
             "Network printer scanning",
-            "Enhanced printer connectivity testing"
+            "Enhanced printer connectivity testing",
+            "Chunked writes with job progress tracking",
+            "Per-printer profiles (port, paper width, codepage, cutter)",
+            "Printer groups with load balancing and failover",
+            "Server-Sent Events for job, printer and scan status",
+            "Per-stage Server-Timing and slow request log"
         ]
     }
 
 
+@app.get("/api/v1/status")
+async def hub_status(_=Depends(authenticate)):
+    """Printer states, queue depth and group load of this hub (aggregated by router mode)."""
+    return {
+        "service": "WN-PrinterHub",
+        "version": "1.0.0",
+        "printers": printer_monitor.snapshot(),
+        "queue_depth": scheduler.queue_depths(),
+        "groups": group_router.status(),
+        "loop_lag": loop_lag_monitor.stats(),
+        "admission": admission.stats(),
+        "warmup": warmup_state.to_dict(),
+        "timestamp": time.time()
+    }
+
+
+@app.get("/api/v1/debug/slow")
+async def slow_request_log(_=Depends(authenticate)):
+    """Recent requests slower than WN_SLOW_REQUEST_MS with their stage timings, newest first."""
+    return {
+        "ok": True,
+        "threshold_ms": slow_requests.threshold_ms,
+        "loop_lag": loop_lag_monitor.stats(),
+        "requests": slow_requests.entries()
+    }
+
+
+@app.post("/api/v1/debug/profile")
+async def profile_loop(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    _=Depends(authenticate)
+):
+    """
+    Sample the event loop thread's stack for a while (requires WN_PROFILER_ENABLED).
+    
+    Returns the most frequent stacks in collapsed form, leaf frame last.
+    """
+    if not config.profiler_enabled:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set WN_PROFILER_ENABLED=true)")
+    try:
+        result = await profile_event_loop(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, **result}
+
+
+# Router mode: forward and aggregate calls to downstream hubs
+hub_registry: Optional[HubRegistry] = None
+if config.router_mode:
+    hub_registry = HubRegistry(
+        load_hubs(config.router_hubs_file),
+        default_token=config.api_token,
+        timeout_s=config.router_timeout_s,
+        cache_ttl_s=config.router_cache_ttl_s
+    )
+    app.include_router(create_hub_router(hub_registry, authenticate))
+
+
+async def warm_up():
+    """Warm codecs, rendering and printer connections, then record which printers answered."""
+    entries = config.warmup_printers or [
+        host for profile in profile_registry.profiles for host in profile.hosts
+    ]
+    printers = parse_printers(entries, lambda host: profile_registry.for_host(host).port)
+    printer_monitor.track(printers)
+    await run_warmup(warmup_state, profile_registry.all(), printers, config.warmup_timeout_ms)
+    for printer in warmup_state.printers:
+        printer_monitor.observe(printer["host"], printer["port"], printer["ok"])
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """Application startup event."""
     logger.info("WN-PrinterHub starting up...")
     logger.info(f"Default printer port: {config.printer_default_port}")
+    logger.info(f"Printer chunk size: {config.printer_chunk_size} bytes, "
+                f"delay {config.printer_chunk_delay_ms}ms, flow control {config.printer_flow_control}")
+    logger.info(f"Printer profiles: {len(profile_registry.profiles)} configured")
+    # Event stream tokens travel in the query string
+    logging.getLogger("uvicorn.access").addFilter(RedactTokenFilter())
+    
+    printer_monitor.track(
+        (host, profile.port) for profile in profile_registry.profiles for host in profile.hosts
+    )
+    app.state.printer_monitor_task = asyncio.create_task(printer_monitor.run())
+    app.state.loop_lag_task = asyncio.create_task(loop_lag_monitor.run())
+    if config.warmup_enabled:
+        # Runs in the background so /health can answer 503 until it is done
+        app.state.warmup_task = asyncio.create_task(warm_up())
+    if hub_registry is not None:
+        await hub_registry.start()
     logger.info(f"Allowed CORS origins: {config.allowed_origins}")
     logger.info(f"Authentication: {'enabled' if config.use_auth else 'DISABLED'}")
     
@@ -385,6 +1206,31 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("WN-PrinterHub shutting down...")
+    
+    for name in ("warmup_task", "printer_monitor_task", "loop_lag_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    if hub_registry is not None:
+        await hub_registry.close()
+
+
+def serving_options() -> dict:
+    """
+    uvicorn event loop and HTTP parser for serving.
+    
+    Uses uvloop and httptools when installed and WN_FAST_SERVING is on,
+    otherwise the stdlib asyncio loop and h11.
+    """
+    import importlib.util
+    
+    fast = config.fast_serving
+    loop = "uvloop" if fast and importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if fast and importlib.util.find_spec("httptools") else "h11"
+    logger.info(f"Serving with loop={loop}, http={http}, json={DefaultResponse.__name__}")
+    return {"loop": loop, "http": http}
 
 
 if __name__ == "__main__":
@@ -408,5 +1254,6 @@ def main():
         "app.main:app",
         host=config.host,
         port=config.port,
-        log_level=config.log_level.lower()
+        log_level=config.log_level.lower(),
+        **serving_options()
     )
\ No newline at end of file
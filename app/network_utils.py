@@ -3,17 +3,53 @@ Network utilities for WN-PrinterHub
 Enhanced network operations and printer discovery
 """
 import asyncio
+import contextlib
+import ipaddress
+import re
 import socket
+import struct
+import sys
+import time
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor
 
+from .admission import admission
+from .escpos_utils import ESCPOSCommands
+from .tracing import span
+
 logger = logging.getLogger(__name__)
 
 
+# Largest range scanned as-is; bigger interface networks are narrowed to the local /24
+MAX_SCAN_PREFIX = 22
+
+# ioctl request codes (linux/sockios.h)
+SIOCGIFFLAGS = 0x8913
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891B
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+
+# Cached interface list, keyed by a fingerprint of the OS interface/route state
+_interfaces_cache: Optional[Tuple[Any, List[Dict[str, Any]]]] = None
+_FALLBACK_CACHE_TTL_S = 60.0
+
+
+def hosts_for_cidr(cidr: str) -> List[str]:
+    """Expand a CIDR range into host addresses, refusing ranges larger than MAX_SCAN_PREFIX."""
+    network = ipaddress.ip_network(cidr, strict=False)
+    if network.version != 4:
+        raise ValueError(f"Only IPv4 ranges can be scanned: {cidr}")
+    if network.prefixlen < MAX_SCAN_PREFIX:
+        raise ValueError(f"Range {cidr} is too large; use /{MAX_SCAN_PREFIX} or smaller")
+    return [str(host) for host in network.hosts()]
+
+
 async def scan_network_for_printers(network_base: str = "192.168.1", 
                                    port: int = 9100,
-                                   timeout_ms: int = 1000) -> List[Dict[str, Any]]:
+                                   timeout_ms: int = 1000,
+                                   cidrs: Optional[List[str]] = None) -> List[Dict[str, Any]]:
     """
     Scan a network range for printers on the specified port.
     
@@ -21,20 +57,23 @@ async def scan_network_for_printers(network_base: str = "192.168.1",
         network_base: Network base (e.g., "192.168.1" for 192.168.1.x)
         port: Port to scan (default 9100 for JetDirect)
         timeout_ms: Timeout per host in milliseconds
+        cidrs: CIDR ranges to scan instead of network_base (e.g. ["10.0.4.0/23"])
     
     Returns:
         List of dictionaries with printer information
     """
-    logger.info(f"Scanning network {network_base}.1-254 on port {port}")
-    
-    # Create IP range
-    hosts = [f"{network_base}.{i}" for i in range(1, 255)]
-    
+    if cidrs:
+        logger.info(f"Scanning {', '.join(cidrs)} on port {port}")
+        with span("scan_expand"):
+            hosts = list(dict.fromkeys(host for cidr in cidrs for host in hosts_for_cidr(cidr)))
+    else:
+        logger.info(f"Scanning network {network_base}.1-254 on port {port}")
+        hosts = [f"{network_base}.{i}" for i in range(1, 255)]
     # Create semaphore to limit concurrent connections
     semaphore = asyncio.Semaphore(50)
     
     async def check_host(host: str) -> Optional[Dict[str, Any]]:
-        async with semaphore:
+        async with semaphore, admission.reserve_socket(wait=True):
             try:
                 start_time = asyncio.get_event_loop().time()
                 
@@ -61,7 +100,8 @@ async def scan_network_for_printers(network_base: str = "192.168.1",
     
     # Run scan concurrently
     tasks = [check_host(host) for host in hosts]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    with span("scan_sweep"):
+        results = await asyncio.gather(*tasks, return_exceptions=True)
     
     # Filter successful connections
     printers = [result for result in results if result is not None and not isinstance(result, Exception)]
@@ -70,38 +110,169 @@ async def scan_network_for_printers(network_base: str = "192.168.1",
     return printers
 
 
+# Local addresses in /proc/net/fib_trie: "|-- 192.168.1.5" followed by "/32 host LOCAL"
+_FIB_LOCAL_ADDRESS = re.compile(rb"\|-- ([0-9.]+)\n\s+/32 host LOCAL")
+
+
+def _interfaces_fingerprint() -> Any:
+    """
+    Cheap snapshot of interface, route and address state.
+    
+    Routes alone miss a new address in the same subnet (e.g. a DHCP renewal),
+    so the local addresses from the FIB are part of it too.
+    """
+    try:
+        with open("/proc/net/route", "rb") as f:
+            routes = f.read()
+        with open("/proc/net/fib_trie", "rb") as f:
+            addresses = frozenset(_FIB_LOCAL_ADDRESS.findall(f.read()))
+    except OSError:
+        return None
+    return (tuple(socket.if_nameindex()), routes, addresses)
+
+
+def _read_interfaces_ioctl() -> List[Dict[str, Any]]:
+    """Read IPv4 address and netmask of every interface that is up (Linux ioctl, no traffic)."""
+    import fcntl
+    
+    interfaces = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        for _, name in socket.if_nameindex():
+            request = struct.pack("256s", name.encode()[:15])
+            try:
+                flags = struct.unpack("H", fcntl.ioctl(s.fileno(), SIOCGIFFLAGS, request)[16:18])[0]
+                if not flags & IFF_UP:
+                    continue
+                ip = socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFADDR, request)[20:24])
+                netmask = socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFNETMASK, request)[20:24])
+            except OSError:
+                # No IPv4 address on this interface
+                continue
+            interfaces.append(_interface_entry(name, ip, netmask, bool(flags & IFF_LOOPBACK), "os"))
+    return interfaces
+
+
+def _read_interfaces_fallback() -> List[Dict[str, Any]]:
+    """Resolve the hostname's addresses when ioctl is unavailable or found nothing; netmask is assumed /24."""
+    interfaces = []
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET)}
+    except socket.gaierror:
+        addresses = set()
+    try:
+        # Source address of the default route; a UDP connect sends no packets
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("8.8.8.8", 80))
+            addresses.add(s.getsockname()[0])
+    except OSError:
+        pass
+    for ip in sorted(addresses):
+        loopback = ipaddress.ip_address(ip).is_loopback
+        interfaces.append(_interface_entry("unknown", ip, "255.255.255.0", loopback, "assumed"))
+    return interfaces
+
+
+def _interface_entry(name: str, ip: str, netmask: str, loopback: bool, source: str) -> Dict[str, Any]:
+    network = ipaddress.ip_network(f"{ip}/{netmask}", strict=False)
+    scan_network = network
+    if network.prefixlen < MAX_SCAN_PREFIX:
+        scan_network = ipaddress.ip_network(f"{ip}/24", strict=False)
+    return {
+        "name": name,
+        "ip": ip,
+        "netmask": netmask,
+        "cidr": str(network),
+        "scan_range": str(scan_network),
+        "loopback": loopback,
+        "netmask_source": source,
+    }
+
+
+def _default_route_interface() -> Optional[str]:
+    """Name of the interface holding the IPv4 default route, if known."""
+    try:
+        with open("/proc/net/route") as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if len(fields) > 1 and fields[1] == "00000000":
+                    return fields[0]
+    except (OSError, StopIteration):
+        pass
+    return None
+
+
+def get_local_interfaces() -> List[Dict[str, Any]]:
+    """
+    List local IPv4 interfaces with their real netmasks.
+    
+    Reads the OS interface table without sending any traffic. The result is
+    cached and only re-read when the interface/route state changes.
+    """
+    global _interfaces_cache
+    fingerprint = _interfaces_fingerprint()
+    if fingerprint is None:
+        # No /proc to detect changes; refresh on a timer instead
+        fingerprint = int(time.monotonic() // _FALLBACK_CACHE_TTL_S)
+    
+    if _interfaces_cache is not None and _interfaces_cache[0] == fingerprint:
+        return _interfaces_cache[1]
+    
+    interfaces = []
+    if sys.platform.startswith("linux"):
+        try:
+            interfaces = _read_interfaces_ioctl()
+        except (ImportError, OSError, AttributeError) as e:
+            logger.debug(f"Interface ioctl unavailable ({e})")
+    if not interfaces:
+        # Non-Linux, or every ioctl failed (e.g. SIOCGIF* codes not supported)
+        interfaces = _read_interfaces_fallback()
+    
+    # Default-route interface first, loopback last
+    default_iface = _default_route_interface()
+    interfaces.sort(key=lambda i: (i["loopback"], i["name"] != default_iface))
+    
+    _interfaces_cache = (fingerprint, interfaces)
+    logger.debug(f"Local interfaces: {[i['cidr'] for i in interfaces]}")
+    return interfaces
+
+
 def get_local_network_info() -> Dict[str, Any]:
     """Get information about the local network interfaces."""
     try:
-        # Get hostname
         hostname = socket.gethostname()
-        
-        # Get local IP
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.connect(("8.8.8.8", 80))
-            local_ip = s.getsockname()[0]
-        
-        # Calculate network base
-        ip_parts = local_ip.split(".")
-        network_base = f"{ip_parts[0]}.{ip_parts[1]}.{ip_parts[2]}"
-        
+    except Exception:
+        hostname = "unknown"
+    
+    interfaces = get_local_interfaces()
+    lan_interfaces = [i for i in interfaces if not i["loopback"]]
+    if not lan_interfaces:
+        logger.warning("No non-loopback IPv4 interface found")
         return {
             "hostname": hostname,
-            "local_ip": local_ip,
-            "network_base": network_base,
-            "suggested_scan_range": f"{network_base}.1-254"
-        }
-    except Exception as e:
-        logger.error(f"Failed to get network info: {e}")
-        return {
-            "hostname": "unknown",
             "local_ip": "unknown",
             "network_base": "192.168.1",
-            "suggested_scan_range": "192.168.1.1-254"
+            "suggested_scan_range": "192.168.1.1-254",
+            "interfaces": interfaces,
+            "scan_ranges": []
         }
+    
+    primary = lan_interfaces[0]
+    local_ip = primary["ip"]
+    network_base = local_ip.rsplit(".", 1)[0]
+    
+    return {
+        "hostname": hostname,
+        "local_ip": local_ip,
+        "network_base": network_base,
+        "suggested_scan_range": f"{network_base}.1-254",
+        "interfaces": interfaces,
+        "scan_ranges": list(dict.fromkeys(i["scan_range"] for i in lan_interfaces))
+    }
 
 
-async def enhanced_ping(host: str, port: int = 9100, timeout_ms: int = 1500) -> Dict[str, Any]:
+async def enhanced_ping(host: str, port: int = 9100, timeout_ms: int = 1500,
+                        mode: str = "full") -> Dict[str, Any]:
     """
     Enhanced ping with additional information about the printer.
     
@@ -109,41 +280,43 @@ async def enhanced_ping(host: str, port: int = 9100, timeout_ms: int = 1500) ->
         host: Target host IP
         port: Target port
         timeout_ms: Connection timeout in milliseconds
+        mode: "connect" returns once the TCP handshake completes,
+              "status" queries real-time status (DLE EOT 1) with a short read,
+              "full" also asks for the firmware version (ESC v, up to 0.5s)
     
     Returns:
         Dictionary with ping results and additional info
+    
+    Raises:
+        OverBudget: No printer socket became free within the admission queue timeout
     """
+    async with admission.reserve_socket():
+        return await _ping(host, port, timeout_ms, mode)
+
+
+async def _ping(host: str, port: int, timeout_ms: int, mode: str) -> Dict[str, Any]:
     start_time = asyncio.get_event_loop().time()
     
     try:
         # Basic connectivity test
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(host, port),
-            timeout=timeout_ms / 1000
-        )
+        with span("ping_connect"):
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port),
+                timeout=timeout_ms / 1000
+            )
         
-        # Try to get some printer information (if available)
         printer_info = {}
-        try:
-            # Send a simple query (ESC/POS status request)
-            writer.write(b"\x1b\x76")  # ESC v (return firmware version - if supported)
-            await writer.drain()
-            
-            # Try to read response with short timeout
-            try:
-                response = await asyncio.wait_for(reader.read(1024), timeout=0.5)
-                if response:
-                    printer_info["raw_response"] = response.hex()
-                    printer_info["response_length"] = len(response)
-            except asyncio.TimeoutError:
-                # No response is normal for many printers
-                pass
-            
-        except Exception as e:
-            logger.debug(f"Could not query printer info: {e}")
+        if mode == "status":
+            with span("ping_status"):
+                printer_info = await _query_status(reader, writer)
+        elif mode == "full":
+            with span("ping_firmware"):
+                printer_info = await _query_firmware(reader, writer)
         
-        writer.close()
-        await writer.wait_closed()
+        with span("ping_close"):
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
         
         latency = int((asyncio.get_event_loop().time() - start_time) * 1000)
         
@@ -151,6 +324,7 @@ async def enhanced_ping(host: str, port: int = 9100, timeout_ms: int = 1500) ->
             "ok": True,
             "latency_ms": latency,
             "message": f"Connected {host}:{port}",
+            "mode": mode,
             "printer_info": printer_info,
             "connection_time": asyncio.get_event_loop().time()
         }
@@ -184,6 +358,50 @@ async def enhanced_ping(host: str, port: int = 9100, timeout_ms: int = 1500) ->
         }
 
 
+async def _query_status(reader, writer, timeout_s: float = 0.2) -> Dict[str, Any]:
+    """Query real-time printer status (DLE EOT 1)."""
+    try:
+        writer.write(ESCPOSCommands.STATUS_PRINTER)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(1), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        return {"status_supported": False}
+    except Exception as e:
+        logger.debug(f"Could not query printer status: {e}")
+        return {"status_supported": False}
+    
+    if not response:
+        return {"status_supported": False}
+    return {
+        "status_supported": True,
+        "status_byte": response.hex(),
+        "online": not response[0] & ESCPOSCommands.STATUS_OFFLINE_BIT
+    }
+
+
+async def _query_firmware(reader, writer) -> Dict[str, Any]:
+    """Try to get printer information (ESC v) - most printers never answer."""
+    printer_info = {}
+    try:
+        # Send a simple query (ESC/POS status request)
+        writer.write(b"\x1b\x76")  # ESC v (return firmware version - if supported)
+        await writer.drain()
+        
+        # Try to read response with short timeout
+        try:
+            response = await asyncio.wait_for(reader.read(1024), timeout=0.5)
+            if response:
+                printer_info["raw_response"] = response.hex()
+                printer_info["response_length"] = len(response)
+        except asyncio.TimeoutError:
+            # No response is normal for many printers
+            pass
+        
+    except Exception as e:
+        logger.debug(f"Could not query printer info: {e}")
+    return printer_info
+
+
 def validate_ip_address(ip: str) -> bool:
     """Validate if a string is a valid IP address."""
     try:
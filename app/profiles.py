@@ -0,0 +1,126 @@
+"""
+Printer profiles for WN-PrinterHub
+Per-device capabilities (port, paper width, codepage, write pacing) and printer groups loaded from a JSON file
+"""
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .config import config
+from .groups import PrinterGroup
+
+logger = logging.getLogger(__name__)
+
+
+class PrinterProfile(BaseModel):
+    """Capabilities and connection settings of a printer or printer model."""
+    name: str = Field("default", description="Profile name")
+    model: Optional[str] = Field(None, description="Printer model this profile applies to")
+    hosts: List[str] = Field(default_factory=list, description="Printer IPs using this profile")
+    port: int = Field(9100, ge=1, le=65535, description="RAW/JetDirect port")
+    columns: int = Field(32, ge=16, le=128, description="Characters per line in normal font")
+    dot_width: Optional[int] = Field(
+        None, ge=128, le=2048, description="Printable width in dots, set with GS W (None keeps the printer's)"
+    )
+    codepage: Optional[int] = Field(None, ge=0, le=255, description="ESC t character code table")
+    encoding: str = Field("utf-8", description="Text encoding matching the codepage")
+    max_chunk_size: int = Field(4096, ge=0, description="Bytes per write (0 = single write)")
+    chunk_delay_ms: int = Field(0, ge=0, le=5000, description="Pause between chunks")
+    flow_control: bool = Field(False, description="Check DLE EOT status between chunks")
+    cut_supported: bool = Field(True, description="Printer has an auto-cutter")
+    max_connections: int = Field(1, ge=1, le=16, description="Concurrent connections allowed to one printer")
+
+
+def default_profile() -> PrinterProfile:
+    """Build the fallback profile from environment configuration."""
+    return PrinterProfile(
+        name="default",
+        port=config.printer_default_port,
+        max_chunk_size=config.printer_chunk_size,
+        chunk_delay_ms=config.printer_chunk_delay_ms,
+        flow_control=config.printer_flow_control,
+    )
+
+
+class ProfileRegistry:
+    """Resolves printer profiles by host or model."""
+
+    def __init__(self, default: Optional[PrinterProfile] = None, profiles: Optional[List[PrinterProfile]] = None,
+                 groups: Optional[Dict[str, PrinterGroup]] = None):
+        self.default = default or default_profile()
+        self.profiles = profiles or []
+        self.groups = groups or {}
+        self._by_name = {p.name: p for p in self.profiles}
+        self._by_model = {p.model.lower(): p for p in self.profiles if p.model}
+        self._by_host = {host: p for p in self.profiles for host in p.hosts}
+
+    def get(self, name: str) -> Optional[PrinterProfile]:
+        """Look up a profile by name or model."""
+        if name == self.default.name:
+            return self.default
+        return self._by_name.get(name) or self._by_model.get(name.lower())
+
+    def for_host(self, host: str, profile: Optional[str] = None) -> PrinterProfile:
+        """
+        Resolve the profile for a printer.
+
+        An explicit profile name/model wins, then a host assignment, then the default.
+        """
+        resolved = None
+        if profile:
+            resolved = self.get(profile)
+            if resolved is None:
+                logger.warning(f"Unknown printer profile '{profile}', using host/default profile")
+        if resolved is None:
+            resolved = self._by_host.get(host, self.default)
+        return resolved
+
+    def all(self) -> List[PrinterProfile]:
+        """Return the default profile followed by the configured ones."""
+        return [self.default] + self.profiles
+
+
+def load_profiles(path: Optional[str] = None) -> ProfileRegistry:
+    """
+    Load printer profiles from a JSON file.
+
+    File format::
+
+        {
+          "default": {"columns": 32},
+          "profiles": [
+            {"name": "kitchen-80mm", "model": "TM-T82", "hosts": ["192.168.1.50"], "columns": 48}
+          ],
+          "groups": {
+            "kitchen": {"hosts": ["192.168.1.50", "192.168.1.51"], "strategy": "least_outstanding"}
+          }
+        }
+
+    Fields missing from "default" come from environment configuration. A missing or
+    invalid file falls back to the default profile only.
+    """
+    if not path:
+        return ProfileRegistry()
+
+    try:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        base = default_profile().model_dump()
+        base.update(data.get("default", {}))
+        base["name"] = "default"
+        default = PrinterProfile(**base)
+        profiles = [PrinterProfile(**item) for item in data.get("profiles", [])]
+        groups = {
+            name: PrinterGroup(name=name, **item) for name, item in data.get("groups", {}).items()
+        }
+        logger.info(f"Loaded {len(profiles)} printer profiles and {len(groups)} groups from {path}")
+        return ProfileRegistry(default, profiles, groups)
+    except Exception as e:
+        logger.error(f"Failed to load printer profiles from {path}: {e}")
+        return ProfileRegistry()
+
+
+# Global profile registry
+profile_registry = load_profiles(config.printer_profiles_file)
@@ -0,0 +1,140 @@
+"""
+Response serialization for WN-PrinterHub
+orjson-backed JSON responses and pre-validated response models
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .config import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Default response class: orjson when installed and fast serving is on, stdlib json otherwise
+DefaultResponse = ORJSONResponse if orjson is not None and config.fast_serving else JSONResponse
+
+
+def dumps(content: Any) -> str:
+    """Serialize to a JSON string with the fastest available encoder."""
+    if DefaultResponse is ORJSONResponse:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(content)
+
+
+def model_response(model: BaseModel, status_code: int = 200, exclude_none: bool = False) -> Response:
+    """
+    Return an already-validated model as JSON, bypassing jsonable_encoder.
+
+    Pydantic serializes the model to bytes directly, so large results skip
+    FastAPI's per-field re-encoding of returned dicts.
+    """
+    return Response(
+        content=model.model_dump_json(exclude_none=exclude_none),
+        status_code=status_code,
+        media_type="application/json"
+    )
+
+
+class PingResponse(BaseModel):
+    """Printer ping result."""
+    ok: bool
+    latency_ms: int
+    message: str
+    mode: Optional[str] = None
+    printer_info: Optional[Dict[str, Any]] = None
+    connection_time: Optional[float] = None
+    error_type: Optional[str] = None
+    error_details: Optional[str] = None
+    host: Optional[str] = None
+    port: Optional[int] = None
+    profile: Optional[str] = None
+
+
+class ScannedPrinter(BaseModel):
+    """Printer found by a network scan."""
+    host: str
+    port: int
+    status: str
+    latency_ms: int
+    profile: Optional[str] = None
+
+
+class NetworkInterface(BaseModel):
+    """Local IPv4 interface."""
+    name: str
+    ip: str
+    netmask: str
+    cidr: str
+    scan_range: str
+    loopback: bool
+    netmask_source: str
+
+
+class NetworkInfo(BaseModel):
+    """Local network information."""
+    hostname: str
+    local_ip: str
+    network_base: str
+    suggested_scan_range: str
+    interfaces: List[NetworkInterface] = []
+    scan_ranges: List[str] = []
+
+
+class NetworkInfoResponse(BaseModel):
+    """Response of the network info endpoint."""
+    ok: bool = True
+    network_info: NetworkInfo
+
+
+class ScanResponse(BaseModel):
+    """Response of the network scan endpoint."""
+    ok: bool = True
+    network_base: str
+    ranges: List[str]
+    port: int
+    printers_found: int
+    printers: List[ScannedPrinter]
+    scan_info: NetworkInfo
+
+
+class JobStatus(BaseModel):
+    """Print job state and progress."""
+    job_id: str
+    host: str
+    port: int
+    mode: str
+    priority: str = "normal"
+    status: str
+    total_bytes: int
+    bytes_sent: int
+    chunks_sent: int
+    progress: float
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class JobStatusResponse(BaseModel):
+    """Response of the job status endpoint."""
+    ok: bool = True
+    job: JobStatus
+
+
+class JobListResponse(BaseModel):
+    """Response of the job list endpoint."""
+    ok: bool = True
+    jobs: List[JobStatus]
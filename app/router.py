@@ -0,0 +1,220 @@
+"""
+Router mode for WN-PrinterHub
+Federates several downstream PrinterHub instances behind one API
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+
+from .coalesce import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Hub endpoints that may be called through the router, by method
+FORWARDED_PATHS = {
+    "POST": {"print", "print/raw", "printers/ping", "printers/ping/bulk", "printers/scan"},
+    "GET": {"jobs", "network/info", "printers/profiles", "printers/groups", "status"},
+}
+# Parameterized hub endpoints, e.g. polling a job created through the router
+FORWARDED_PATTERNS = {
+    "GET": re.compile(r"jobs/[A-Za-z0-9_-]+"),
+}
+# Hub response headers passed back to the client
+FORWARDED_RESPONSE_HEADERS = ("retry-after",)
+
+
+class Hub(BaseModel):
+    """A downstream PrinterHub instance."""
+    name: str = Field(..., description="Hub name, e.g. the store code")
+    url: str = Field(..., description="Base URL, e.g. http://10.1.0.5:8088")
+    token: Optional[str] = Field(None, description="API token of the hub (defaults to the router token)")
+
+
+def load_hubs(path: str) -> List[Hub]:
+    """
+    Load downstream hubs from a JSON file.
+
+    File format::
+
+        {"hubs": [{"name": "store-01", "url": "http://10.1.0.5:8088", "token": "..."}]}
+    """
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    hubs = [Hub(**item) for item in data.get("hubs", [])]
+    names = [hub.name for hub in hubs]
+    if len(names) != len(set(names)):
+        raise ValueError("Hub names must be unique")
+    return hubs
+
+
+class HubRegistry:
+    """Downstream hubs sharing one pooled keep-alive HTTP client."""
+
+    def __init__(self, hubs: List[Hub], default_token: Optional[str] = None,
+                 timeout_s: float = 10.0, cache_ttl_s: float = 30.0, max_connections: int = 20):
+        self.hubs = {hub.name: hub for hub in hubs}
+        self.default_token = default_token
+        self.timeout_s = timeout_s
+        self.max_connections = max_connections
+        self._client = None
+        self._printers = SingleFlight(ttl_s=cache_ttl_s)
+        self._last_seen: Dict[str, float] = {}
+
+    async def start(self):
+        """Open the pooled HTTP client."""
+        import httpx
+
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_s,
+            limits=httpx.Limits(
+                max_connections=self.max_connections * max(len(self.hubs), 1),
+                max_keepalive_connections=self.max_connections * max(len(self.hubs), 1),
+            ),
+        )
+        logger.info(f"Router mode: {len(self.hubs)} downstream hubs")
+
+    async def close(self):
+        """Close pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get(self, name: str) -> Hub:
+        hub = self.hubs.get(name)
+        if hub is None:
+            raise HTTPException(status_code=404, detail=f"Unknown hub: {name}")
+        return hub
+
+    async def request(self, hub: Hub, method: str, path: str, stream: bool = False, **kwargs):
+        """
+        Call a hub endpoint under /api/v1 with the hub's token.
+
+        With stream=True the body is not read; the caller must close the response.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        token = hub.token or self.default_token
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        url = f"{hub.url.rstrip('/')}/api/v1/{path}"
+        request = self._client.build_request(method, url, headers=headers, **kwargs)
+        response = await self._client.send(request, stream=stream)
+        self._last_seen[hub.name] = time.time()
+        return response
+
+    async def _get_json(self, hub: Hub, path: str) -> Dict[str, Any]:
+        try:
+            response = await self.request(hub, "GET", path)
+            response.raise_for_status()
+            return {"ok": True, "hub": hub.name, **response.json()}
+        except Exception as e:
+            logger.warning(f"Hub {hub.name} {path} failed: {e}")
+            return {"ok": False, "hub": hub.name, "error": str(e) or type(e).__name__}
+
+    async def fan_out(self, path: str) -> Dict[str, Any]:
+        """GET the same path on every hub in parallel."""
+        hubs = list(self.hubs.values())
+        results = await asyncio.gather(*(self._get_json(hub, path) for hub in hubs))
+        return {hub.name: result for hub, result in zip(hubs, results)}
+
+    async def printers(self, hub: Hub) -> Dict[str, Any]:
+        """A hub's known printers, cached for cache_ttl_s (failures are not cached)."""
+        async def fetch():
+            result = await self._get_json(hub, "status")
+            if not result["ok"]:
+                raise ConnectionError(result["error"])
+            return result
+
+        try:
+            return await self._printers.do(hub.name, fetch)
+        except ConnectionError as e:
+            return {"ok": False, "hub": hub.name, "error": str(e)}
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Hub list for the API, without tokens."""
+        return [
+            {"name": hub.name, "url": hub.url, "last_seen": self._last_seen.get(hub.name)}
+            for hub in self.hubs.values()
+        ]
+
+
+def create_hub_router(registry: HubRegistry, authenticate: Callable) -> APIRouter:
+    """Routes under /api/v1/hubs that forward to and aggregate downstream hubs."""
+    router = APIRouter(prefix="/api/v1/hubs", tags=["router"], dependencies=[Depends(authenticate)])
+
+    @router.get("")
+    async def list_hubs():
+        """List downstream hubs."""
+        return {"ok": True, "hubs": registry.describe()}
+
+    @router.get("/status")
+    async def hubs_status():
+        """Health, printer states and queue depth of every hub, queried in parallel."""
+        return {"ok": True, "hubs": await registry.fan_out("status")}
+
+    @router.get("/printers")
+    async def hubs_printers():
+        """Known printers of every hub, served from a short cache."""
+        hubs = list(registry.hubs.values())
+        results = await asyncio.gather(*(registry.printers(hub) for hub in hubs))
+        return {
+            "ok": True,
+            "hubs": {
+                hub.name: {"ok": result["ok"], "printers": result.get("printers", {}), "error": result.get("error")}
+                for hub, result in zip(hubs, results)
+            }
+        }
+
+    async def forward(hub_name: str, path: str, request: Request) -> StreamingResponse:
+        pattern = FORWARDED_PATTERNS.get(request.method)
+        if path not in FORWARDED_PATHS.get(request.method, set()) and not (pattern and pattern.fullmatch(path)):
+            raise HTTPException(status_code=404, detail=f"Path not forwarded: {request.method} {path}")
+        hub = registry.get(hub_name)
+        headers = {
+            name: value for name, value in request.headers.items()
+            if name.lower() in ("content-type", "content-encoding")
+        }
+        try:
+            response = await registry.request(
+                hub, request.method, path, stream=True,
+                params=request.query_params, content=await request.body(), headers=headers
+            )
+        except Exception as e:
+            logger.error(f"Forwarding {path} to hub {hub.name} failed: {e}")
+            raise HTTPException(status_code=502, detail=f"Hub {hub.name} unreachable: {str(e) or type(e).__name__}")
+        
+        response_headers = {
+            name: response.headers[name] for name in FORWARDED_RESPONSE_HEADERS if name in response.headers
+        }
+        if "server-timing" in response.headers:
+            # Kept apart from the router's own timings, which are added on the way out
+            response_headers["Server-Timing"] = ", ".join(
+                f"hub_{metric.strip()}" for metric in response.headers["server-timing"].split(",") if metric.strip()
+            )
+        # Streamed through, so bulk ping NDJSON still arrives as each result completes
+        return StreamingResponse(
+            response.aiter_bytes(),
+            status_code=response.status_code,
+            media_type=response.headers.get("content-type"),
+            headers=response_headers,
+            background=BackgroundTask(response.aclose)
+        )
+
+    @router.post("/{hub_name}/{path:path}")
+    async def forward_post(hub_name: str, path: str, request: Request):
+        """Forward a print, ping or scan call to a hub."""
+        return await forward(hub_name, path, request)
+
+    @router.get("/{hub_name}/{path:path}")
+    async def forward_get(hub_name: str, path: str, request: Request):
+        """Forward a read-only call to a hub."""
+        return await forward(hub_name, path, request)
+
+    return router
@@ -0,0 +1,164 @@
+"""
+Print job scheduling for WN-PrinterHub
+Per-printer dispatch queues ordered by priority and deadline
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value is dispatched first
+PRIORITIES = {"urgent": 0, "normal": 1, "bulk": 2}
+
+# Sends one segment: (segment, bytes already sent by this job) -> bytes sent
+SegmentSender = Callable[[Any, int], Awaitable[int]]
+
+
+class DeadlineExceeded(Exception):
+    """A job's deadline passed before it reached the printer; it was not printed."""
+
+
+class ScheduledJob:
+    """
+    A print job waiting in a printer's dispatch queue.
+
+    Segments are payloads sent on separate connections, usually bytes; a
+    segment may also be a chunk iterable streamed into the printer.
+    """
+
+    def __init__(self, segments: List[Any], priority: str, deadline: Optional[float], send: SegmentSender):
+        self.segments = segments
+        self.priority = priority
+        self.deadline = deadline
+        self.send = send
+        self.next_segment = 0
+        self.bytes_sent = 0
+        self.started = False
+        self.future: asyncio.Future = asyncio.get_event_loop().create_future()
+
+    def sort_key(self) -> Tuple[int, float]:
+        return (PRIORITIES[self.priority], self.deadline if self.deadline is not None else math.inf)
+
+
+class PrinterDispatcher:
+    """
+    Dispatch queue for one printer.
+
+    Jobs are ordered by priority class, then earliest deadline, then arrival.
+    A multi-segment job is re-queued after each segment, so urgent jobs that
+    arrive meanwhile are printed between its tickets. Jobs whose deadline
+    passes before their first segment starts are dropped as soon as it passes,
+    even while another job's ticket is still printing.
+    """
+
+    def __init__(self, name: str, concurrency: int = 1,
+                 on_idle: Optional[Callable[["PrinterDispatcher"], None]] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.on_idle = on_idle
+        self._queue: List[Tuple[int, float, int, ScheduledJob]] = []
+        self._seq = itertools.count()
+        self._workers = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting (not counting segments being sent)."""
+        return len(self._queue)
+
+    def submit(self, job: ScheduledJob) -> asyncio.Future:
+        """Queue a job; the returned future resolves with the bytes sent."""
+        if job.deadline is not None:
+            timer = asyncio.get_event_loop().call_later(
+                max(job.deadline - time.monotonic(), 0), self._expire, job
+            )
+            job.future.add_done_callback(lambda _: timer.cancel())
+        self._push(job)
+        return job.future
+
+    def _expire(self, job: ScheduledJob):
+        # The worker skips jobs whose future is already resolved
+        if not job.started:
+            logger.warning(f"Dropping {job.priority} job for {self.name}: deadline passed")
+            _resolve(job.future, error=DeadlineExceeded("Deadline passed before printing"))
+
+    def _push(self, job: ScheduledJob):
+        heapq.heappush(self._queue, (*job.sort_key(), next(self._seq), job))
+        if self._workers < self.concurrency:
+            self._workers += 1
+            asyncio.ensure_future(self._work())
+
+    async def _work(self):
+        try:
+            while self._queue:
+                job = heapq.heappop(self._queue)[-1]
+                if job.future.done():
+                    continue
+                await self._run_segment(job)
+        finally:
+            self._workers -= 1
+            if not self._workers and not self._queue and self.on_idle:
+                self.on_idle(self)
+
+    async def _run_segment(self, job: ScheduledJob):
+        if job.next_segment == 0 and job.deadline is not None and time.monotonic() > job.deadline:
+            logger.warning(f"Dropping {job.priority} job for {self.name}: deadline passed")
+            _resolve(job.future, error=DeadlineExceeded("Deadline passed before printing"))
+            return
+
+        segment = job.segments[job.next_segment]
+        job.started = True
+        try:
+            sent = await job.send(segment, job.bytes_sent)
+        except Exception as e:
+            error = e
+            if job.next_segment > 0:
+                # Part of the job is already on paper; do not let callers retry it elsewhere
+                error = Exception(f"{e} (after {job.next_segment} of {len(job.segments)} tickets printed)")
+            _resolve(job.future, error=error)
+            return
+
+        job.bytes_sent += sent
+        job.next_segment += 1
+        if job.next_segment < len(job.segments):
+            self._push(job)
+        else:
+            _resolve(job.future, result=job.bytes_sent)
+
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[Exception] = None):
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class Scheduler:
+    """Holds one dispatcher per printer (host, port) while it has work queued or in flight."""
+
+    def __init__(self):
+        self._dispatchers: Dict[Tuple[str, int], PrinterDispatcher] = {}
+
+    def dispatcher(self, host: str, port: int, concurrency: int = 1) -> PrinterDispatcher:
+        """Get or create the dispatcher for a printer; submit to it right away, idle ones are dropped."""
+        key = (host, port)
+        dispatcher = self._dispatchers.get(key)
+        if dispatcher is None:
+            dispatcher = self._dispatchers[key] = PrinterDispatcher(
+                f"{host}:{port}", concurrency, on_idle=lambda d: self._drop(key, d)
+            )
+        return dispatcher
+
+    def _drop(self, key: Tuple[str, int], dispatcher: PrinterDispatcher):
+        if self._dispatchers.get(key) is dispatcher:
+            del self._dispatchers[key]
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Waiting jobs per printer."""
+        return {d.name: d.depth for d in self._dispatchers.values() if d.depth}
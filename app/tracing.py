@@ -0,0 +1,204 @@
+"""
+Request tracing for WN-PrinterHub
+Per-stage span timing, slow request log, event-loop lag monitor and sampling profiler
+"""
+import asyncio
+import collections
+import contextvars
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Trace:
+    """Span durations collected while handling one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+
+    def add(self, name: str, duration_s: float):
+        """Add time to a span; repeated spans (e.g. several chunks) are summed."""
+        self.spans[name] = self.spans.get(name, 0.0) + duration_s
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def mark(self, label: str):
+        """Remember the current time under label."""
+        self.marks[label] = time.perf_counter()
+
+    def add_since(self, name: str, label: str):
+        """Add the time since mark(label), or since the start when it was never marked, to a span."""
+        self.add(name, time.perf_counter() - self.marks.get(label, self.start))
+
+    def server_timing(self) -> str:
+        """Format spans as a Server-Timing header value."""
+        parts = [f"{name};dur={duration * 1000:.1f}" for name, duration in self.spans.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def to_dict(self) -> Dict[str, float]:
+        return {name: round(duration * 1000, 2) for name, duration in self.spans.items()}
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("wn_trace", default=None)
+
+
+def start_trace() -> Trace:
+    """Begin a trace for the current request context."""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace of the request being handled, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def use_trace(trace: Optional[Trace]) -> Iterator[None]:
+    """Attribute spans to a given trace, e.g. inside a shared worker task."""
+    token = _current_trace.set(trace)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a stage of the current request; a no-op outside a traced request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - start)
+
+
+def mark(label: str):
+    """Remember the current time in the current request's trace, for a later span_since(label)."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark(label)
+
+
+def span_since(name: str, label: str):
+    """Record the time since mark(label), or since the start of the request, as a span."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_since(name, label)
+
+
+class SlowRequestLog:
+    """Ring buffer of the most recent slow requests."""
+
+    def __init__(self, threshold_ms: float = 500.0, size: int = 100):
+        self.threshold_ms = threshold_ms
+        self._entries: Deque[Dict[str, Any]] = collections.deque(maxlen=size)
+
+    def record(self, method: str, path: str, status_code: int, trace: Trace, loop_lag_ms: float):
+        """Keep the request if it took longer than the threshold."""
+        total_ms = trace.elapsed() * 1000
+        if total_ms < self.threshold_ms:
+            return
+        self._entries.append({
+            "timestamp": time.time(),
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "total_ms": round(total_ms, 2),
+            "spans_ms": trace.to_dict(),
+            "loop_lag_ms": round(loop_lag_ms, 2),
+        })
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Slow requests, newest first."""
+        return list(reversed(self._entries))
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a fixed sleep."""
+
+    def __init__(self, interval_s: float = 0.5, warn_ms: float = 100.0, window: int = 120):
+        self.interval_s = interval_s
+        self.warn_ms = warn_ms
+        self.current_ms = 0.0
+        self._samples: Deque[float] = collections.deque(maxlen=window)
+
+    async def run(self):
+        """Sample loop lag forever."""
+        loop = asyncio.get_event_loop()
+        while True:
+            expected = loop.time() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            self.current_ms = max(0.0, (loop.time() - expected) * 1000)
+            self._samples.append(self.current_ms)
+            if self.current_ms > self.warn_ms:
+                logger.warning(f"Event loop lag {self.current_ms:.0f}ms")
+
+    def stats(self) -> Dict[str, float]:
+        """Current, mean and max lag over the sample window."""
+        samples = list(self._samples)
+        return {
+            "current_ms": round(self.current_ms, 2),
+            "mean_ms": round(sum(samples) / len(samples), 2) if samples else 0.0,
+            "max_ms": round(max(samples), 2) if samples else 0.0,
+            "samples": len(samples),
+            "interval_ms": self.interval_s * 1000,
+        }
+
+
+def sample_stacks(thread_id: int, duration_s: float, interval_s: float, top: int = 30) -> Dict[str, Any]:
+    """
+    Sample one thread's stack periodically; blocking, run it in a worker thread.
+
+    Returns the most frequent stacks in collapsed form ("file:func:line;..." leaf last).
+    """
+    counts: Dict[str, int] = collections.Counter()
+    samples = 0
+    deadline = time.monotonic() + duration_s
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            counts[";".join(reversed(stack))] += 1
+            samples += 1
+        time.sleep(interval_s)
+    return {
+        "samples": samples,
+        "duration_s": duration_s,
+        "interval_ms": interval_s * 1000,
+        "stacks": [{"stack": stack, "count": count} for stack, count in counts.most_common(top)],
+    }
+
+
+_profile_lock = threading.Lock()
+
+
+async def profile_event_loop(duration_s: float, interval_s: float) -> Dict[str, Any]:
+    """Sample the event loop thread for duration_s without blocking it; one profile at a time."""
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        loop_thread = threading.get_ident()
+        return await asyncio.get_event_loop().run_in_executor(
+            None, sample_stacks, loop_thread, duration_s, interval_s
+        )
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,136 @@
+"""
+Startup warm-up for WN-PrinterHub
+Primes codecs, renders a sample receipt and pre-connects to printers before reporting ready
+"""
+import asyncio
+import codecs
+import contextlib
+import logging
+import socket
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .admission import admission
+from .escpos_utils import create_receipt, create_simple_text
+from .profiles import PrinterProfile
+
+logger = logging.getLogger(__name__)
+
+# Exercises accented Vietnamese, a currency sign and box drawing in every codec
+_SAMPLE_TEXT = "Xin chào – Cà phê sữa đá 25.000₫ ─"
+
+
+class WarmupState:
+    """Progress of the startup warm-up; the hub reports not-ready until it is done."""
+
+    def __init__(self, ready: bool = False):
+        self.ready = ready
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.codecs: List[str] = []
+        self.receipt_bytes = 0
+        self.printers: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            "ready": self.ready,
+            "duration_ms": duration,
+            "codecs": self.codecs,
+            "receipt_bytes": self.receipt_bytes,
+            "printers": self.printers,
+        }
+
+
+def parse_printers(entries: Iterable[str], default_port: Callable[[str], int]) -> List[Tuple[str, int]]:
+    """Parse "host" or "host:port" entries; hosts without a port use default_port(host)."""
+    printers = []
+    for entry in entries:
+        host, sep, port = entry.strip().rpartition(":")
+        if not (sep and port.isdigit() and ":" not in host):
+            host, port = entry.strip(), None
+        printers.append((host, int(port) if port else default_port(host)))
+    return list(dict.fromkeys(printers))
+
+
+def prime_codecs(profiles: Iterable[PrinterProfile]) -> List[str]:
+    """Look up and exercise every text encoding the profiles use, loading the codec modules."""
+    primed = []
+    for encoding in dict.fromkeys(["utf-8", "ascii"] + [p.encoding for p in profiles]):
+        try:
+            codecs.lookup(encoding)
+            _SAMPLE_TEXT.encode(encoding, errors="replace")
+            primed.append(encoding)
+        except LookupError:
+            logger.warning(f"Warm-up: unknown encoding '{encoding}' in printer profiles")
+    return primed
+
+
+def render_samples(profiles: Iterable[PrinterProfile]) -> int:
+    """Render a sample receipt and text ticket for each distinct profile layout; returns bytes rendered."""
+    rendered = 0
+    layouts = dict.fromkeys((p.columns, p.codepage, p.encoding, p.cut_supported, p.dot_width) for p in profiles)
+    for columns, codepage, encoding, cut_supported, dot_width in layouts:
+        options = dict(columns=columns, codepage=codepage, encoding=encoding, cut_supported=cut_supported,
+                       dot_width=dot_width)
+        rendered += len(create_receipt(
+            [{"name": "Cà phê sữa", "qty": 2, "price": 2.5}, {"name": "Bánh mì", "qty": 1, "price": 1.75}],
+            6.75, header="WN-PrinterHub", footer="Cảm ơn quý khách", datetime=time.strftime("%Y-%m-%d %H:%M"),
+            **options
+        ))
+        rendered += len(create_simple_text(_SAMPLE_TEXT, **options))
+    return rendered
+
+
+async def preconnect(host: str, port: int, timeout_ms: int) -> Dict[str, Any]:
+    """Resolve a printer's address and open (then close) a TCP connection to it."""
+    loop = asyncio.get_event_loop()
+    result: Dict[str, Any] = {"host": host, "port": port, "ok": False}
+    start = loop.time()
+    try:
+        await asyncio.wait_for(loop.getaddrinfo(host, port, type=socket.SOCK_STREAM), timeout=timeout_ms / 1000)
+        result["resolve_ms"] = round((loop.time() - start) * 1000, 1)
+        async with admission.reserve_socket(wait=True):
+            start = loop.time()
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout_ms / 1000)
+            result["connect_ms"] = round((loop.time() - start) * 1000, 1)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+        result["ok"] = True
+    except asyncio.TimeoutError:
+        result["error"] = "timeout"
+    except OSError as e:
+        result["error"] = str(e) or type(e).__name__
+    return result
+
+
+async def run_warmup(state: WarmupState, profiles: List[PrinterProfile],
+                     printers: List[Tuple[str, int]], timeout_ms: int):
+    """
+    Run every warm-up step and mark the state ready.
+
+    Unreachable printers are reported but do not keep the hub from becoming
+    ready; each connect is bounded by timeout_ms and they run concurrently.
+    """
+    state.started_at = time.time()
+    try:
+        state.codecs = prime_codecs(profiles)
+        state.receipt_bytes = render_samples(profiles)
+        state.printers = list(await asyncio.gather(
+            *(preconnect(host, port, timeout_ms) for host, port in printers)
+        ))
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}", exc_info=True)
+    finally:
+        state.finished_at = time.time()
+        state.ready = True
+
+    reachable = sum(1 for printer in state.printers if printer["ok"])
+    logger.info(
+        f"Warm-up done in {(state.finished_at - state.started_at) * 1000:.0f}ms: "
+        f"codecs {', '.join(state.codecs)}; {state.receipt_bytes} sample bytes rendered; "
+        f"{reachable}/{len(state.printers)} printers reachable"
+    )
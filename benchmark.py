@@ -0,0 +1,148 @@
+# Throughput benchmark for WN-PrinterHub
+# Compares the default and fast serving profiles against a local fake printer
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).parent
+
+
+def start_fake_printer(port: int):
+    """Run a printer stand-in that accepts and discards RAW data, in a background thread."""
+    async def handle(reader, writer):
+        while await reader.read(65536):
+            pass
+        writer.close()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(handle, "127.0.0.1", port, backlog=1024))
+        loop.run_until_complete(server.serve_forever())
+
+    threading.Thread(target=run, daemon=True).start()
+
+
+def start_hub(port: int, printer_port: int, fast: bool) -> subprocess.Popen:
+    """Start a PrinterHub process with the requested serving profile."""
+    env = dict(
+        os.environ,
+        USE_AUTH="false",
+        WN_HOST="127.0.0.1",
+        WN_PORT=str(port),
+        WN_PRINTER_DEFAULT_PORT=str(printer_port),
+        WN_PING_CACHE_TTL_MS="0",
+        WN_LOG_LEVEL="WARNING",
+        WN_FAST_SERVING="true" if fast else "false",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-c", "from app.main import main; main()"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_ready(base_url: str, timeout_s: float = 15.0):
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("Hub did not become ready")
+
+
+def build_request(method: str, path: str, body) -> bytes:
+    """Serialize one keep-alive HTTP/1.1 request."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: keep-alive\r\n"
+    if body is not None:
+        head += f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+    return head.encode() + b"\r\n" + payload
+
+
+_CONTENT_LENGTH = re.compile(rb"(?i)\r\ncontent-length: *(\d+)")
+
+
+async def load(port: int, method: str, path: str, body, concurrency: int, duration_s: float) -> float:
+    """
+    Run a closed-loop load and return successful requests per second.
+
+    Each worker replays a pre-built request on its own keep-alive connection
+    with a minimal response parser, so the load generator uses far less CPU
+    than the hub and the numbers reflect the server, even on one core.
+    """
+    request = build_request(method, path, body)
+    deadline = time.monotonic() + duration_s
+
+    async def worker() -> int:
+        done = 0
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            while time.monotonic() < deadline:
+                writer.write(request)
+                head = await reader.readuntil(b"\r\n\r\n")
+                await reader.readexactly(int(_CONTENT_LENGTH.search(head).group(1)))
+                if head.startswith(b"HTTP/1.1 200"):
+                    done += 1
+        finally:
+            writer.close()
+        return done
+
+    start = time.monotonic()
+    done = sum(await asyncio.gather(*(worker() for _ in range(concurrency))))
+    return done / (time.monotonic() - start)
+
+
+SCENARIOS = [
+    ("health", "GET", "/health", None),
+    ("ping", "POST", "/api/v1/printers/ping", {"host": "127.0.0.1", "mode": "connect"}),
+    ("print", "POST", "/api/v1/print", {"printer": {"host": "127.0.0.1"}, "mode": "text", "text": "Benchmark receipt\n" * 20}),
+]
+
+
+async def run_profile(fast: bool, args) -> dict:
+    hub = start_hub(args.port, args.printer_port, fast)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(base_url)
+        results = {}
+        for name, method, path, body in SCENARIOS:
+            results[name] = await load(args.port, method, path, body, args.concurrency, args.duration)
+        return results
+    finally:
+        hub.terminate()
+        hub.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WN-PrinterHub serving profiles")
+    parser.add_argument("--port", type=int, default=18088)
+    parser.add_argument("--printer-port", type=int, default=19100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario")
+    args = parser.parse_args()
+
+    start_fake_printer(args.printer_port)
+    default = asyncio.run(run_profile(False, args))
+    fast = asyncio.run(run_profile(True, args))
+
+    print(f"{'scenario':<10}{'default req/s':>16}{'fast req/s':>14}{'gain':>9}")
+    for name, *_ in SCENARIOS:
+        gain = (fast[name] / default[name] - 1) * 100 if default[name] else 0
+        print(f"{name:<10}{default[name]:>16.0f}{fast[name]:>14.0f}{gain:>8.0f}%")
+
+
+if __name__ == "__main__":
+    main()
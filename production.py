@@ -34,7 +34,7 @@ def main():
         
         # Import here to ensure proper setup
         import uvicorn
-        from app.main import app
+        from app.main import app, serving_options
         from app.config import config
         
         # Production configuration
@@ -45,7 +45,7 @@ def main():
             log_level=config.log_level.lower(),
             access_log=True,
             workers=1,  # Single worker for TCP connection management
-            loop="asyncio"
+            **serving_options()
         )
         
     except Exception as e:
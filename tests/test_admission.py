@@ -0,0 +1,89 @@
+"""Tests for admission control budgets."""
+import asyncio
+
+import pytest
+
+from app.admission import Budget, OverBudget, Reservation
+
+
+async def test_budget_grants_immediately_within_capacity():
+    budget = Budget("bytes", 10)
+    assert await budget.acquire(6, timeout_s=0.1) == 6
+    assert await budget.acquire(4, timeout_s=0.1) == 4
+    assert budget.stats() == {"in_use": 10, "capacity": 10, "waiting": 0, "rejected": 0}
+
+
+async def test_budget_grants_waiters_in_arrival_order():
+    budget = Budget("bytes", 10)
+    await budget.acquire(8, timeout_s=None)
+    large = asyncio.ensure_future(budget.acquire(6, timeout_s=None))
+    await asyncio.sleep(0)
+    # Would fit now, but must not overtake the waiter ahead of it
+    small = asyncio.ensure_future(budget.acquire(2, timeout_s=None))
+    await asyncio.sleep(0)
+    assert not small.done()
+
+    budget.release(8)
+    assert await large == 6
+    assert await small == 2
+    assert budget.in_use == 8
+
+
+async def test_budget_rejects_after_timeout():
+    budget = Budget("sockets", 1, retry_after_s=3)
+    await budget.acquire(1, timeout_s=None)
+    with pytest.raises(OverBudget) as excinfo:
+        await budget.acquire(1, timeout_s=0.01)
+    assert excinfo.value.retry_after_s == 3
+    assert budget.stats() == {"in_use": 1, "capacity": 1, "waiting": 0, "rejected": 1}
+
+
+async def test_budget_timed_out_head_waiter_unblocks_smaller_ones():
+    budget = Budget("bytes", 10)
+    await budget.acquire(5, timeout_s=None)
+    large = asyncio.ensure_future(budget.acquire(10, timeout_s=0.01))
+    await asyncio.sleep(0)
+    small = asyncio.ensure_future(budget.acquire(5, timeout_s=None))
+    with pytest.raises(OverBudget):
+        await large
+    assert await small == 5
+    assert budget.in_use == 10
+
+
+async def test_budget_cancelled_waiter_leaves_queue():
+    budget = Budget("bytes", 1)
+    await budget.acquire(1, timeout_s=None)
+    waiter = asyncio.ensure_future(budget.acquire(1, timeout_s=None))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    budget.release(1)
+    assert budget.stats()["waiting"] == 0
+    assert budget.in_use == 0
+
+
+async def test_budget_refuses_more_than_capacity():
+    with pytest.raises(ValueError):
+        await Budget("bytes", 10).acquire(11, timeout_s=None)
+
+
+async def test_budget_reserve_releases_on_exit():
+    budget = Budget("scans", 2)
+    async with budget.reserve(2) as held:
+        assert held == 2
+        assert budget.in_use == 2
+    assert budget.in_use == 0
+
+
+async def test_reservation_held_until_future_is_done():
+    budget = Budget("bytes", 10)
+    reservation = Reservation(budget, await budget.acquire(4, timeout_s=None))
+    job = asyncio.get_event_loop().create_future()
+    reservation.hold_until(job)
+
+    reservation.release()
+    assert budget.in_use == 4
+    job.set_result(None)
+    await asyncio.sleep(0)
+    assert budget.in_use == 0
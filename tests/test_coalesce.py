@@ -0,0 +1,96 @@
+"""Tests for single-flight request coalescing."""
+import asyncio
+
+import pytest
+
+from app.coalesce import SingleFlight
+
+
+class Probe:
+    """Counts calls and returns the call number, after waiting for release."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.calls
+
+
+async def test_concurrent_calls_share_one_flight():
+    flight = SingleFlight()
+    probe = Probe()
+    waiters = [asyncio.ensure_future(flight.do("printer", probe)) for _ in range(3)]
+    await asyncio.sleep(0)
+    probe.release.set()
+    assert await asyncio.gather(*waiters) == [1, 1, 1]
+    assert probe.calls == 1
+
+
+async def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    probe = Probe()
+    probe.release.set()
+    assert await asyncio.gather(flight.do(("a", 500), probe), flight.do(("a", 1500), probe)) == [1, 2]
+
+
+async def test_results_cached_for_ttl():
+    flight = SingleFlight(ttl_s=0.05)
+    probe = Probe()
+    probe.release.set()
+    assert await flight.do("printer", probe) == 1
+    assert await flight.do("printer", probe) == 1
+    await asyncio.sleep(0.06)
+    assert await flight.do("printer", probe) == 2
+
+
+async def test_without_ttl_results_are_not_cached():
+    flight = SingleFlight()
+    probe = Probe()
+    probe.release.set()
+    assert await flight.do("printer", probe) == 1
+    assert await flight.do("printer", probe) == 2
+
+
+async def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight(ttl_s=60)
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        raise OSError("unreachable")
+
+    results = await asyncio.gather(flight.do("printer", failing), flight.do("printer", failing),
+                                   return_exceptions=True)
+    assert [type(result) for result in results] == [OSError, OSError]
+    with pytest.raises(OSError):
+        await flight.do("printer", failing)
+    assert calls == 2
+
+
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    probe = Probe()
+    cancelled = asyncio.ensure_future(flight.do("printer", probe))
+    other = asyncio.ensure_future(flight.do("printer", probe))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    probe.release.set()
+    assert await other == 1
+    assert cancelled.cancelled()
+
+
+async def test_invalidate_where_drops_matching_keys():
+    flight = SingleFlight(ttl_s=60)
+    probe = Probe()
+    probe.release.set()
+    for key in [("10.0.0.1", 9100, "full", 500), ("10.0.0.1", 9100, "connect", 1500), ("10.0.0.2", 9100, "full", 500)]:
+        await flight.do(key, probe)
+    flight.invalidate_where(lambda key: key[:2] == ("10.0.0.1", 9100))
+    assert await flight.do(("10.0.0.1", 9100, "full", 500), probe) == 4
+    assert await flight.do(("10.0.0.2", 9100, "full", 500), probe) == 3
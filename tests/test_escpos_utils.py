@@ -0,0 +1,54 @@
+"""Tests for ESC/POS command parsing and ticket splitting."""
+from app.escpos_utils import CommandScanner, create_receipt, create_simple_text, split_at_cuts
+
+CUT = b"\x1dV\x00"
+
+
+def raster(width_bytes: int, height: int, fill: bytes) -> bytes:
+    """GS v 0 raster image whose data repeats fill."""
+    size = width_bytes * height
+    header = b"\x1dv0\x00" + width_bytes.to_bytes(2, "little") + height.to_bytes(2, "little")
+    return header + (fill * size)[:size]
+
+
+def test_split_at_cuts_splits_rendered_tickets():
+    receipt = create_receipt([{"name": "Cà phê", "qty": 1, "price": 2.5}], 2.5, header="WN")
+    text = create_simple_text("hello")
+    assert split_at_cuts(receipt + text + receipt) == [receipt, text, receipt]
+
+
+def test_split_at_cuts_ignores_cut_bytes_inside_raster_data():
+    # Image bytes that look like a cut followed by ESC @
+    image = raster(6, 4, CUT + b"\x1b@")
+    ticket = b"\x1b@" + image + b"\n" + CUT
+    assert split_at_cuts(ticket + ticket) == [ticket, ticket]
+
+
+def test_split_at_cuts_needs_init_after_cut():
+    # A cut that is not followed by ESC @ does not start a new ticket
+    data = b"\x1b@one\n" + CUT + b"two\n" + CUT
+    assert split_at_cuts(data) == [data]
+
+
+def test_split_at_cuts_stops_after_unknown_command():
+    first = b"\x1b@one\n" + CUT
+    rest = b"\x1b@\x1d\xfe??" + CUT + b"\x1b@three\n" + CUT
+    assert split_at_cuts(first + rest) == [first, rest]
+
+
+def test_command_scanner_skips_raster_and_barcode_data():
+    data = b"\x1b@" + raster(2, 3, b"\n\x1b") + b"ab\n" + b"\x1dk\x04123\x00" + CUT
+    ends = CommandScanner().feed(data)
+    assert [command for _, command in ends] == [b"\x1b@", b"\x1dv", b"\n", b"\x1dk", b"\x1dV"]
+    assert ends[-1][0] == len(data)
+
+
+def test_command_scanner_gives_same_ends_for_any_chunking():
+    data = b"\x1b@\x1b!\x08" + raster(3, 2, b"\x1dV") + b"line\n\x1b(A\x02\x00ab" + b"\x1dVA\x10"
+    expected = CommandScanner().feed(data)
+    for size in range(1, 12):
+        scanner = CommandScanner()
+        ends = []
+        for start in range(0, len(data), size):
+            ends += [(start + end, command) for end, command in scanner.feed(data[start:start + size])]
+        assert ends == expected, size
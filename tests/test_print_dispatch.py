@@ -0,0 +1,77 @@
+"""Tests for print dispatch to printer groups."""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app import main
+from app.groups import GroupRouter, PrinterGroup
+
+FIRST_TICKET = b"\x1b@first\n\x1dV\x00"
+TICKETS = FIRST_TICKET + b"\x1b@second\n\x1dV\x00"
+
+
+class FakePrinters:
+    """Printers on 127.0.0.1 and 127.0.0.2 sharing a port, recording what each receives."""
+
+    def __init__(self):
+        self.received = {"127.0.0.1": [], "127.0.0.2": []}
+        # Hosts that stop accepting connections after their first one
+        self.stop_after_one = set()
+        self.servers = {}
+
+    async def start(self) -> int:
+        self.servers["127.0.0.1"] = await asyncio.start_server(self._handler("127.0.0.1"), "127.0.0.1", 0)
+        port = self.servers["127.0.0.1"].sockets[0].getsockname()[1]
+        self.servers["127.0.0.2"] = await asyncio.start_server(self._handler("127.0.0.2"), "127.0.0.2", port)
+        return port
+
+    def _handler(self, host):
+        async def handle(reader, writer):
+            if host in self.stop_after_one:
+                self.servers[host].close()
+            self.received[host].append(await reader.read())
+            writer.close()
+        return handle
+
+    def close(self):
+        for server in self.servers.values():
+            server.close()
+
+
+@pytest.fixture
+async def printers(monkeypatch):
+    """Fake printers in group "kitchen", used by the default profile."""
+    printers = FakePrinters()
+    port = await printers.start()
+    monkeypatch.setattr(main.profile_registry, "default", main.profile_registry.default.model_copy(
+        update={"port": port, "flow_control": False, "chunk_delay_ms": 0}
+    ))
+    monkeypatch.setattr(main, "group_router", GroupRouter({
+        "kitchen": PrinterGroup(name="kitchen", hosts=["127.0.0.1", "127.0.0.2"], cooldown_s=30)
+    }))
+    try:
+        yield printers
+    finally:
+        printers.close()
+
+
+async def test_group_fails_over_when_connect_fails(printers):
+    printers.servers["127.0.0.1"].close()
+    await printers.servers["127.0.0.1"].wait_closed()
+
+    result = await main.dispatch_print(main.PrintTarget(group="kitchen"), "raw", lambda profile: TICKETS)
+    assert (result["host"], result["attempts"]) == ("127.0.0.2", 2)
+    assert printers.received["127.0.0.2"] == [TICKETS]
+
+
+async def test_group_does_not_fail_over_after_partial_print(printers):
+    # Bulk jobs go out one ticket per connection, so the second ticket's connect is refused
+    printers.stop_after_one.add("127.0.0.1")
+    with pytest.raises(HTTPException):
+        await main.dispatch_print(
+            main.PrintTarget(group="kitchen"), "raw", lambda profile: TICKETS, priority="bulk"
+        )
+    assert printers.received == {"127.0.0.1": [FIRST_TICKET], "127.0.0.2": []}
+    # The member that failed mid-job is tried last from now on
+    assert main.group_router.candidates("kitchen") == ["127.0.0.2", "127.0.0.1"]
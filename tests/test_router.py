@@ -0,0 +1,199 @@
+"""End-to-end tests for router mode: two hubs and a router run as separate servers."""
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+HUB_TOKEN = "hub-token"
+ROUTER_TOKEN = "router-token"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakePrinter(socketserver.ThreadingTCPServer):
+    """
+    A RAW port printer recording the bytes of every connection.
+
+    A talkative printer answers ESC v (firmware query) at once; a silent one
+    never answers, so full-mode pings of it wait for their read timeout.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, talkative: bool):
+        self.talkative = talkative
+        self.received = []
+        super().__init__((host, port), FakePrinterHandler)
+
+
+class FakePrinterHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data = b""
+        while True:
+            chunk = self.request.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+            if self.server.talkative and chunk.endswith(b"\x1bv"):
+                self.request.sendall(b"\x01")
+        self.server.received.append(data)
+
+
+def start_server(env: dict, port: int) -> subprocess.Popen:
+    """Run the app under uvicorn and wait until it answers /health."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=ROOT, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server on port {port} exited with {process.returncode}")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return process
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+@pytest.fixture(scope="module")
+def cluster(tmp_path_factory):
+    """Hubs store-a and store-b behind a router, plus store-down, which is not running."""
+    printer_port = free_port()
+    printers = {
+        "127.0.0.1": FakePrinter("127.0.0.1", printer_port, talkative=True),
+        "127.0.0.2": FakePrinter("127.0.0.2", printer_port, talkative=False),
+    }
+    for printer in printers.values():
+        threading.Thread(target=printer.serve_forever, daemon=True).start()
+
+    hub_env = {
+        "WN_API_TOKEN": HUB_TOKEN,
+        "USE_AUTH": "true",
+        "WN_WARMUP_ENABLED": "false",
+        "WN_PRINTER_DEFAULT_PORT": str(printer_port),
+    }
+    hub_ports = {"store-a": free_port(), "store-b": free_port()}
+    hubs_file = tmp_path_factory.mktemp("router") / "hubs.json"
+    hubs_file.write_text(json.dumps({"hubs": [
+        *({"name": name, "url": f"http://127.0.0.1:{port}", "token": HUB_TOKEN} for name, port in hub_ports.items()),
+        {"name": "store-down", "url": f"http://127.0.0.1:{free_port()}", "token": HUB_TOKEN},
+    ]}))
+    router_port = free_port()
+
+    router = httpx.Client(base_url=f"http://127.0.0.1:{router_port}", timeout=10,
+                          headers={"Authorization": f"Bearer {ROUTER_TOKEN}"})
+    hubs = {
+        name: httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10,
+                           headers={"Authorization": f"Bearer {HUB_TOKEN}"})
+        for name, port in hub_ports.items()
+    }
+    processes = []
+    try:
+        for port in hub_ports.values():
+            processes.append(start_server(hub_env, port))
+        processes.append(start_server({
+            **hub_env,
+            "WN_API_TOKEN": ROUTER_TOKEN,
+            "WN_ROUTER_MODE": "true",
+            "WN_ROUTER_HUBS_FILE": str(hubs_file),
+            "WN_ROUTER_TIMEOUT_S": "5",
+        }, router_port))
+        yield {"router": router, "hubs": hubs, "printers": printers}
+    finally:
+        for client in [router, *hubs.values()]:
+            client.close()
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        for printer in printers.values():
+            printer.shutdown()
+            printer.server_close()
+
+
+def test_print_is_forwarded_to_hub(cluster):
+    response = cluster["router"].post("/api/v1/hubs/store-a/print", json={
+        "printer": {"host": "127.0.0.1"}, "mode": "text", "text": "Forwarded ticket"
+    })
+    assert response.status_code == 200, response.text
+    job = response.json()
+    assert job["ok"] and job["bytes_sent"] > 0
+    assert any(b"Forwarded ticket" in data for data in cluster["printers"]["127.0.0.1"].received)
+    # The hub's own stage timings come back prefixed next to the router's
+    assert "hub_total;dur=" in response.headers["server-timing"]
+
+    # The job can be followed through the router on the hub that printed it
+    status = cluster["router"].get(f"/api/v1/hubs/store-a/jobs/{job['job_id']}")
+    assert status.status_code == 200
+    assert status.json()["job"]["status"] == "completed"
+    assert cluster["router"].get(f"/api/v1/hubs/store-b/jobs/{job['job_id']}").status_code == 404
+
+
+def test_forwarding_rejects_unknown_hub_and_path(cluster):
+    assert cluster["router"].post("/api/v1/hubs/store-x/print", json={}).status_code == 404
+    assert cluster["router"].post("/api/v1/hubs/store-a/debug/profile").status_code == 404
+    assert cluster["router"].get("/api/v1/hubs/store-down/status").status_code == 502
+
+
+def test_router_requires_its_own_token(cluster):
+    response = cluster["router"].get("/api/v1/hubs/status", headers={"Authorization": f"Bearer {HUB_TOKEN}"})
+    assert response.status_code == 403
+
+
+def test_status_fans_out_to_every_hub(cluster):
+    response = cluster["router"].get("/api/v1/hubs/status")
+    assert response.status_code == 200
+    hubs = response.json()["hubs"]
+    assert set(hubs) == {"store-a", "store-b", "store-down"}
+    assert hubs["store-a"]["ok"] and hubs["store-b"]["ok"]
+    assert "queue_depth" in hubs["store-a"]
+    assert not hubs["store-down"]["ok"] and hubs["store-down"]["error"]
+
+
+def test_printer_list_is_cached(cluster):
+    first = cluster["router"].get("/api/v1/hubs/printers").json()["hubs"]
+    assert first["store-b"] == {"ok": True, "printers": {}, "error": None}
+    assert not first["store-down"]["ok"]
+
+    # A print makes the hub track the printer, but the router keeps serving its cached list
+    printed = cluster["hubs"]["store-b"].post("/api/v1/print", json={
+        "printer": {"host": "127.0.0.2"}, "mode": "text", "text": "Direct ticket"
+    })
+    assert printed.status_code == 200, printed.text
+    assert cluster["hubs"]["store-b"].get("/api/v1/status").json()["printers"]
+    assert cluster["router"].get("/api/v1/hubs/printers").json()["hubs"]["store-b"]["printers"] == {}
+
+
+def test_bulk_ping_streams_through_router(cluster):
+    arrivals = []
+    with cluster["router"].stream("POST", "/api/v1/hubs/store-a/printers/ping/bulk", json={
+        "hosts": ["127.0.0.2", "127.0.0.1"], "mode": "full", "timeout_ms": 2000
+    }) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        for line in response.iter_lines():
+            if line:
+                arrivals.append((time.monotonic(), json.loads(line)))
+
+    assert [result["host"] for _, result in arrivals] == ["127.0.0.1", "127.0.0.2"]
+    assert all(result["ok"] for _, result in arrivals)
+    # The silent printer's result follows its read timeout; the first one was not held back for it
+    assert arrivals[1][0] - arrivals[0][0] > 0.3
@@ -0,0 +1,124 @@
+"""Tests for per-printer job scheduling."""
+import asyncio
+import time
+
+import pytest
+
+from app.scheduler import DeadlineExceeded, PrinterDispatcher, ScheduledJob, Scheduler
+
+
+def recording_job(name, order, priority="normal", deadline=None, segments=1, gate=None):
+    """A job whose segments append (name, index) to order, each after waiting for gate if given."""
+    async def send(segment, offset):
+        if gate is not None:
+            await gate.wait()
+        order.append((name, segment))
+        return 1
+
+    return ScheduledJob(list(range(segments)), priority, deadline, send)
+
+
+async def test_jobs_run_by_priority_then_deadline_then_arrival():
+    dispatcher = PrinterDispatcher("printer")
+    order = []
+    gate = asyncio.Event()
+    # Occupies the printer so the rest queue up
+    first = dispatcher.submit(recording_job("first", order, gate=gate))
+    await asyncio.sleep(0)
+    soon = time.monotonic() + 60
+    later = time.monotonic() + 120
+    jobs = [
+        recording_job("bulk", order, "bulk"),
+        recording_job("normal", order),
+        recording_job("normal-late", order, deadline=later),
+        recording_job("normal-soon", order, deadline=soon),
+        recording_job("urgent", order, "urgent"),
+        recording_job("normal-2", order),
+    ]
+    futures = [dispatcher.submit(job) for job in jobs]
+    gate.set()
+    await asyncio.gather(first, *futures)
+    assert [name for name, _ in order] == [
+        "first", "urgent", "normal-soon", "normal-late", "normal", "normal-2", "bulk"
+    ]
+
+
+async def test_urgent_job_prints_between_bulk_segments():
+    dispatcher = PrinterDispatcher("printer")
+    order = []
+    segment_started = asyncio.Event()
+    gate = asyncio.Event()
+
+    async def send_bulk(segment, offset):
+        segment_started.set()
+        await gate.wait()
+        order.append(("bulk", segment))
+        return 10
+
+    bulk = dispatcher.submit(ScheduledJob([0, 1, 2], "bulk", None, send_bulk))
+    await segment_started.wait()
+    urgent = dispatcher.submit(recording_job("urgent", order, "urgent"))
+    gate.set()
+    assert await bulk == 30
+    await urgent
+    assert order == [("bulk", 0), ("urgent", 0), ("bulk", 1), ("bulk", 2)]
+
+
+async def test_deadline_drops_queued_job_while_another_prints():
+    dispatcher = PrinterDispatcher("printer")
+    order = []
+    gate = asyncio.Event()
+    running = dispatcher.submit(recording_job("running", order, gate=gate))
+    await asyncio.sleep(0)
+    expiring = dispatcher.submit(recording_job("expiring", order, deadline=time.monotonic() + 0.05))
+
+    with pytest.raises(DeadlineExceeded):
+        await asyncio.wait_for(expiring, timeout=1)
+    assert not running.done()
+    gate.set()
+    await running
+    assert order == [("running", 0)]
+
+
+async def test_deadline_does_not_drop_started_job():
+    dispatcher = PrinterDispatcher("printer")
+    order = []
+
+    async def slow_send(segment, offset):
+        # Outlasts the deadline while the job is already printing
+        await asyncio.sleep(0.1)
+        order.append(segment)
+        return 1
+
+    job = ScheduledJob([0, 1], "normal", time.monotonic() + 0.05, slow_send)
+    assert await dispatcher.submit(job) == 2
+    assert order == [0, 1]
+
+
+async def test_failure_after_first_ticket_reports_partial_print():
+    dispatcher = PrinterDispatcher("printer")
+
+    class Refused(Exception):
+        pass
+
+    async def send(segment, offset):
+        if segment == 1:
+            raise Refused("connection refused")
+        return 5
+
+    future = dispatcher.submit(ScheduledJob([0, 1, 2], "bulk", None, send))
+    with pytest.raises(Exception) as excinfo:
+        await future
+    # Wrapped so callers cannot mistake it for a failure that left nothing on paper
+    assert not isinstance(excinfo.value, Refused)
+    assert "after 1 of 3 tickets printed" in str(excinfo.value)
+
+
+async def test_scheduler_drops_idle_dispatchers():
+    scheduler = Scheduler()
+    order = []
+    dispatcher = scheduler.dispatcher("10.0.0.1", 9100)
+    assert scheduler.dispatcher("10.0.0.1", 9100) is dispatcher
+    await dispatcher.submit(recording_job("job", order))
+    await asyncio.sleep(0)
+    assert scheduler.dispatcher("10.0.0.1", 9100) is not dispatcher